@@ -1,10 +1,13 @@
 """The EchoMind Assist integration."""
 import logging
-from typing import Any, Dict
+from datetime import timedelta
+import functools
+from typing import Any, Dict, Optional
 
 import async_timeout
 import asyncio
 import aiohttp
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
@@ -12,6 +15,7 @@ from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
 from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.typing import ConfigType
 
 from .const import (
@@ -19,12 +23,26 @@ from .const import (
     APP_NAME,
     CONF_ECHOMIND_ADDON_URL,
     CONF_ENABLE_DEBUG_LOGGING,
+    CONF_ACTIVE_ADDON_URL,
+    CONF_ENABLE_EVICTION,
+    CONF_MAX_MEMORIES,
+    CONF_EVICTION_POLICY,
+    CONF_TRACE_SAMPLE_RATE,
     DEFAULT_ECHOMIND_ADDON_URL,
     DEFAULT_ENABLE_DEBUG_LOGGING,
+    DEFAULT_ENABLE_EVICTION,
+    DEFAULT_MAX_MEMORIES,
+    DEFAULT_EVICTION_POLICY,
+    DEFAULT_TRACE_SAMPLE_RATE,
+    TRACE_BUFFER_SIZE,
     SERVICE_ADD_MEMORY,
     SERVICE_SEARCH_MEMORY,
     SERVICE_CLEAR_MEMORY,
     SERVICE_GET_MEMORY_STATS,
+    SERVICE_GET_JOB_STATUS,
+    SERVICE_EXPORT_MEMORIES,
+    SERVICE_IMPORT_MEMORIES,
+    SERVICE_GET_TRACES,
     ATTR_TEXT,
     ATTR_CONTEXT,
     ATTR_USER_ID,
@@ -35,16 +53,58 @@ from .const import (
     ATTR_MEMORY_ID,
     ATTR_TOTAL_MEMORIES,
     ATTR_LAST_UPDATED,
+    ATTR_JOB_ID,
+    ATTR_JOBS,
+    ATTR_CHUNK_SIZE,
+    ATTR_PATH,
+    ATTR_CURSOR,
+    ATTR_TRACES,
     EVENT_ECHOMIND_MEMORY_ADDED,
     EVENT_ECHOMIND_SEARCH_RESULTS,
-    EVENT_ECHOMIND_STATS_UPDATED
+    EVENT_ECHOMIND_STATS_UPDATED,
+    ROUTE_PROBE_INTERVAL,
+    DEFAULT_CLEANUP_CHUNK_SIZE,
+    JOB_TYPE_RETENTION_CLEANUP,
+    JOB_TYPE_EVICTION,
+    EVICTION_INTERVAL,
+    JOB_TYPE_EXPORT,
+    JOB_TYPE_IMPORT,
+    DEFAULT_EXPORT_PATH,
+    DEFAULT_TRANSFER_CHUNK_SIZE
 )
+from .discovery import async_discover_routes, preferred_route
+from .adaptive import AdaptiveContextStats
+from .batching import WriteBatcher
+from .backup import validate_backup_path, export_runner, import_runner
+from .errors import EchoMindApiError
+from .eviction import MemoryAccessTracker, eviction_runner
+from .jobs import BackgroundJobManager
+from .retention import retention_cleanup_runner
+from .tracing import Tracer, current_trace
 
 _LOGGER = logging.getLogger(__name__)
 
 # Define las plataformas que tu integración usará (por ejemplo, sensor, conversation)
 PLATFORMS: list[Platform] = [Platform.CONVERSATION] # Solo conversation por ahora
 
+# Esquemas de los servicios que lanzan trabajos en segundo plano (mismos rangos que services.yaml)
+CHUNK_SIZE_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=10, max=5000))
+CLEAR_MEMORY_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_USER_ID): cv.string,
+    vol.Optional(ATTR_DAYS_OLD): vol.All(vol.Coerce(int), vol.Range(min=1, max=3650)),
+    vol.Optional(ATTR_CHUNK_SIZE, default=DEFAULT_CLEANUP_CHUNK_SIZE): CHUNK_SIZE_VALIDATOR,
+})
+EXPORT_MEMORIES_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_PATH, default=DEFAULT_EXPORT_PATH): cv.string,
+    vol.Optional(ATTR_CURSOR): vol.Any(None, cv.string),
+    vol.Optional(ATTR_CHUNK_SIZE, default=DEFAULT_TRANSFER_CHUNK_SIZE): CHUNK_SIZE_VALIDATOR,
+})
+IMPORT_MEMORIES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_PATH): cv.string,
+    vol.Optional(ATTR_CURSOR, default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    vol.Optional(ATTR_CHUNK_SIZE, default=DEFAULT_TRANSFER_CHUNK_SIZE): CHUNK_SIZE_VALIDATOR,
+})
+
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the EchoMind Assist integration (yaml config not supported)."""
     # Este componente se configura solo a través de la UI (ConfigFlow)
@@ -58,47 +118,59 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     config = entry.data
     options = entry.options
 
-    # Configurar el nivel de log basado en la opción del config flow
-    # Esto permite cambiar el nivel de log dinámicamente si se implementa un OptionsFlow
-    debug_logging_enabled = options.get(CONF_ENABLE_DEBUG_LOGGING, 
-                                       config.get(CONF_ENABLE_DEBUG_LOGGING, DEFAULT_ENABLE_DEBUG_LOGGING))
-    current_log_level = _LOGGER.getEffectiveLevel()
-    if debug_logging_enabled:
-        if current_log_level > logging.DEBUG:
-            _LOGGER.setLevel(logging.DEBUG)
-            _LOGGER.info("Debug logging enabled for EchoMind Assist.")
-    else:
-        if current_log_level == logging.DEBUG:
-             _LOGGER.setLevel(logging.INFO) # O el nivel por defecto que uses
-             _LOGGER.info("Debug logging disabled for EchoMind Assist.")
-
-    addon_url = config.get(CONF_ECHOMIND_ADDON_URL, DEFAULT_ECHOMIND_ADDON_URL).rstrip('/')
+    configured_url = config.get(CONF_ECHOMIND_ADDON_URL, DEFAULT_ECHOMIND_ADDON_URL).rstrip('/')
+    # Usar la ruta más rápida persistida por el config flow (o la URL configurada como respaldo)
+    addon_url = config.get(CONF_ACTIVE_ADDON_URL, configured_url).rstrip('/')
     
     # Guardar la URL del addon para que los servicios y el agente de conversación puedan usarla
     # También podrías crear un "coordinator" o un "client" si la lógica es más compleja
     hass.data[DOMAIN][entry.entry_id] = {
         CONF_ECHOMIND_ADDON_URL: addon_url,
         "config": config, # Guardar toda la config por si es útil en otros lados
-        "options": options # Guardar opciones si hay un options flow
+        "options": options, # Guardar opciones si hay un options flow
+        "routes": [], # Resultado de la última sonda de rutas (latencias)
+        "jobs": BackgroundJobManager(hass, entry.entry_id), # Trabajos en segundo plano (limpieza, etc.)
+        "access": MemoryAccessTracker(hass, entry.entry_id), # Estadísticas de acceso para el desalojo
+        "adaptive": AdaptiveContextStats(), # Coste por memoria del contexto (latencia, tamaño del prompt)
+        "tracer": Tracer(_trace_sample_rate(config, options), TRACE_BUFFER_SIZE) # Trazas muestreadas por turno
     }
+    await hass.data[DOMAIN][entry.entry_id]["access"].async_load()
+    # Cola de escrituras agrupadas (group commit) para las interacciones del agente
+    hass.data[DOMAIN][entry.entry_id]["batcher"] = WriteBatcher(
+        hass,
+        functools.partial(_call_echomind_api, hass, entry.entry_id),
+        hass.data[DOMAIN][entry.entry_id]["access"],
+    )
     _LOGGER.info(f"EchoMind Assist configured with addon URL: {addon_url}")
 
-    # Verificar conexión con el addon (opcional, pero bueno para early feedback)
-    try:
-        session = async_get_clientsession(hass)
-        async with async_timeout.timeout(10):
-            # Usar el endpoint /api/health si existe
-            response = await session.get(f"{addon_url}/api/health")
-            if response.status != 200:
-                _LOGGER.warning(
-                    f"Failed to connect to EchoMind addon at {addon_url}/api/health (status: {response.status}). "
-                    f"Integration might not work correctly."
-                )
-                # Podrías levantar ConfigEntryNotReady aquí si la conexión es crítica al inicio
-                # raise ConfigEntryNotReady(f"Cannot connect to EchoMind addon at {addon_url}")
-    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
-        _LOGGER.warning(f"Connection to EchoMind addon failed: {err}. Integration might not work.")
-        # raise ConfigEntryNotReady(f"Cannot connect to EchoMind addon: {err}")
+    # Verificar conexión con el addon (sondeo concurrente de todas las rutas candidatas)
+    if not await async_refresh_addon_route(hass, entry):
+        _LOGGER.warning(
+            f"No healthy route to the EchoMind addon found (tried {configured_url} and fallbacks). "
+            f"Integration might not work correctly."
+        )
+        # Podrías levantar ConfigEntryNotReady aquí si la conexión es crítica al inicio
+        # raise ConfigEntryNotReady(f"Cannot connect to EchoMind addon at {addon_url}")
+
+    # Re-evaluar periódicamente la ruta más rápida en segundo plano
+    async def _async_periodic_route_refresh(_now) -> None:
+        await async_refresh_addon_route(hass, entry)
+
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, _async_periodic_route_refresh, timedelta(seconds=ROUTE_PROBE_INTERVAL)
+        )
+    )
+
+    # Pasada periódica de desalojo cuando se supera max_memories (solo si está activado)
+    async def _async_periodic_eviction(_now) -> None:
+        async_start_eviction(hass, entry)
+
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, _async_periodic_eviction, timedelta(seconds=EVICTION_INTERVAL)
+        )
+    )
 
     # Cargar las plataformas (ej. conversation agent)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -111,28 +183,66 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     return True
 
+def _trace_sample_rate(config: Dict[str, Any], options: Dict[str, Any]) -> float:
+    """Return the fraction of turns to trace; debug mode traces every turn."""
+    if options.get(CONF_ENABLE_DEBUG_LOGGING, config.get(CONF_ENABLE_DEBUG_LOGGING, DEFAULT_ENABLE_DEBUG_LOGGING)):
+        return 1.0
+    return options.get(CONF_TRACE_SAMPLE_RATE, config.get(CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE))
+
+async def async_refresh_addon_route(hass: HomeAssistant, entry: ConfigEntry) -> Optional[str]:
+    """Probe all candidate routes and switch to (and persist) the fastest healthy one."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if entry_data is None:
+        return None
+
+    configured_url = entry.data.get(CONF_ECHOMIND_ADDON_URL, DEFAULT_ECHOMIND_ADDON_URL)
+    routes = await async_discover_routes(hass, configured_url)
+    entry_data["routes"] = routes
+    # Histéresis: mantener la ruta actual mientras esté sana salvo que otra sea claramente más rápida
+    route = preferred_route(routes, entry_data[CONF_ECHOMIND_ADDON_URL])
+    if not route:
+        return None
+    if routes[0]["warming_up"]:
+        _LOGGER.info(f"EchoMind addon is warming up its indexes: {routes[0]['warmup']}")
+
+    if route != entry_data[CONF_ECHOMIND_ADDON_URL]:
+        _LOGGER.info(f"Switching EchoMind addon route from {entry_data[CONF_ECHOMIND_ADDON_URL]} to {route}")
+        entry_data[CONF_ECHOMIND_ADDON_URL] = route
+    if entry.data.get(CONF_ACTIVE_ADDON_URL) != route:
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_ACTIVE_ADDON_URL: route}
+        )
+    return route
+
+def async_start_eviction(hass: HomeAssistant, entry: ConfigEntry) -> Optional[str]:
+    """Start a background eviction pass unless one is already running."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if entry_data is None or entry_data["jobs"].is_running(JOB_TYPE_EVICTION):
+        return None
+    if not entry.options.get(CONF_ENABLE_EVICTION, entry.data.get(CONF_ENABLE_EVICTION, DEFAULT_ENABLE_EVICTION)):
+        return None
+
+    max_memories = entry.options.get(CONF_MAX_MEMORIES, entry.data.get(CONF_MAX_MEMORIES, DEFAULT_MAX_MEMORIES))
+    policy = entry.options.get(CONF_EVICTION_POLICY, entry.data.get(CONF_EVICTION_POLICY, DEFAULT_EVICTION_POLICY))
+    runner = eviction_runner(
+        functools.partial(_call_echomind_api, hass, entry.entry_id), entry_data["access"], max_memories, policy
+    )
+    return entry_data["jobs"].async_start(
+        JOB_TYPE_EVICTION, runner, {CONF_MAX_MEMORIES: max_memories, CONF_EVICTION_POLICY: policy}
+    )
+
 async def async_update_options_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
     _LOGGER.debug(f"EchoMind Assist options updated: {entry.options}")
     # Aquí puedes recargar la entrada o actualizar datos si es necesario por cambio de opciones
-    # Por ejemplo, cambiar el nivel de log o reconfigurar partes del componente.
+    # Por ejemplo, reconfigurar partes del componente.
     # await hass.config_entries.async_reload(entry.entry_id)
     
-    # Actualizar el nivel de log basado en la nueva opción
-    debug_logging_enabled = entry.options.get(CONF_ENABLE_DEBUG_LOGGING, DEFAULT_ENABLE_DEBUG_LOGGING)
-    current_log_level = _LOGGER.getEffectiveLevel()
-    if debug_logging_enabled:
-        if current_log_level > logging.DEBUG:
-            _LOGGER.setLevel(logging.DEBUG)
-            _LOGGER.info("Debug logging enabled for EchoMind Assist via options update.")
-    else:
-        if current_log_level == logging.DEBUG:
-             _LOGGER.setLevel(logging.INFO)
-             _LOGGER.info("Debug logging disabled for EchoMind Assist via options update.")
-
     # Guardar las nuevas opciones en hass.data[DOMAIN][entry.entry_id]
     if DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
         hass.data[DOMAIN][entry.entry_id]["options"] = entry.options
+        # El muestreo de trazas cambia en caliente; el nivel de log lo decide la configuración `logger:` de HA
+        hass.data[DOMAIN][entry.entry_id]["tracer"].sample_rate = _trace_sample_rate(entry.data, entry.options)
     else:
         _LOGGER.warning("Could not find EchoMind Assist entry data to update options.")
 
@@ -146,6 +256,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     async_remove_services(hass)
 
     if unload_ok:
+        # Vaciar la cola de escrituras antes de quitar los datos de la entrada: las llamadas a la API los necesitan
+        entry_data = hass.data[DOMAIN][entry.entry_id]
+        await entry_data["jobs"].async_shutdown()
+        await entry_data["batcher"].async_shutdown()
+        await entry_data["access"].async_save()
         hass.data[DOMAIN].pop(entry.entry_id)
         if not hass.data[DOMAIN]: # Si no quedan más entries, limpiar el dominio
             hass.data.pop(DOMAIN)
@@ -168,45 +283,54 @@ async def _call_echomind_api(
     url = f"{base_url}/api/{endpoint}"
     session = async_get_clientsession(hass)
 
-    _LOGGER.debug(f"Calling EchoMind API: {method} {url} with data: {data}")
-
-    try:
-        async with async_timeout.timeout(15): # Timeout un poco más largo para llamadas API
-            if method.upper() == "GET":
-                response = await session.get(url, params=data)
-            elif method.upper() == "POST":
-                response = await session.post(url, json=data)
-            elif method.upper() == "DELETE":
-                response = await session.delete(url, json=data) # DELETE con cuerpo JSON
-            else:
-                _LOGGER.error(f"Unsupported HTTP method: {method}")
-                raise HomeAssistantError(f"Unsupported HTTP method: {method}")
-
-            if response.status == 200 or response.status == 201:
-                try:
-                    result = await response.json()
-                    _LOGGER.debug(f"EchoMind API response from {url}: {result}")
-                    return result
-                except aiohttp.ContentTypeError:
-                     _LOGGER.debug(f"EchoMind API response from {url} was not JSON (status: {response.status}). Assuming success for non-JSON 200/201.")
-                     return {"status": "success", "message": "Operation successful, no JSON response."}
-            elif response.status == 204: # No Content, éxito
-                _LOGGER.debug(f"EchoMind API response from {url}: Success (204 No Content)")
-                return {"status": "success", "message": "Operation successful (204 No Content)."}
-            else:
-                error_text = await response.text()
-                _LOGGER.error(
-                    f"Error calling EchoMind API {url} (status: {response.status}): {error_text}"
-                )
-                raise HomeAssistantError(
-                    f"EchoMind API error (status {response.status}): {error_text[:200]}..."
-                )
-    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-        _LOGGER.error(f"Error calling EchoMind API {url}: {e}")
-        raise HomeAssistantError(f"EchoMind API communication error: {e}")
-    except Exception as e:
-        _LOGGER.exception(f"Unexpected error calling EchoMind API {url}: {e}")
-        raise HomeAssistantError(f"Unexpected EchoMind API error: {e}")
+    # Los payloads solo se copian a la traza si el turno/servicio está muestreado
+    trace = current_trace()
+    if trace:
+        trace.event("api.request", method=method, url=url, data=data)
+
+    with trace.span("api.call", method=method, endpoint=endpoint):
+        try:
+            async with async_timeout.timeout(15): # Timeout un poco más largo para llamadas API
+                if method.upper() == "GET":
+                    response = await session.get(url, params=data)
+                elif method.upper() == "POST":
+                    response = await session.post(url, json=data)
+                elif method.upper() == "DELETE":
+                    response = await session.delete(url, json=data) # DELETE con cuerpo JSON
+                else:
+                    _LOGGER.error(f"Unsupported HTTP method: {method}")
+                    raise HomeAssistantError(f"Unsupported HTTP method: {method}")
+
+                if response.status == 200 or response.status == 201:
+                    try:
+                        result = await response.json()
+                        if trace:
+                            trace.event("api.response", status=response.status, body=result)
+                        return result
+                    except aiohttp.ContentTypeError:
+                        if trace:
+                            trace.event("api.response", status=response.status, body=None)
+                        return {"status": "success", "message": "Operation successful, no JSON response."}
+                elif response.status == 204: # No Content, éxito
+                    if trace:
+                        trace.event("api.response", status=response.status, body=None)
+                    return {"status": "success", "message": "Operation successful (204 No Content)."}
+                else:
+                    error_text = await response.text()
+                    _LOGGER.error(
+                        f"Error calling EchoMind API {url} (status: {response.status}): {error_text}"
+                    )
+                    raise EchoMindApiError(
+                        response.status, f"EchoMind API error (status {response.status}): {error_text[:200]}..."
+                    )
+        except HomeAssistantError:
+            raise # Ya registrado; conservar el tipo (p.ej. el código HTTP de EchoMindApiError)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _LOGGER.error(f"Error calling EchoMind API {url}: {e}")
+            raise HomeAssistantError(f"EchoMind API communication error: {e}")
+        except Exception as e:
+            _LOGGER.exception(f"Unexpected error calling EchoMind API {url}: {e}")
+            raise HomeAssistantError(f"Unexpected EchoMind API error: {e}")
 
 async def async_register_services(hass: HomeAssistant, entry: ConfigEntry):
     """Register the EchoMind Assist services."""
@@ -231,6 +355,7 @@ async def async_register_services(hass: HomeAssistant, entry: ConfigEntry):
         try:
             result = await _call_echomind_api(hass, entry.entry_id, "POST", "memories", payload)
             memory_id = result.get("id", "unknown")
+            hass.data[DOMAIN][entry.entry_id]["access"].record_added(memory_id)
             _LOGGER.info(f"Memory '{text[:50]}...' added to EchoMind with ID: {memory_id}")
             hass.bus.async_fire(EVENT_ECHOMIND_MEMORY_ADDED, {ATTR_MEMORY_ID: memory_id, ATTR_TEXT: text})
         except HomeAssistantError as e:
@@ -250,20 +375,29 @@ async def async_register_services(hass: HomeAssistant, entry: ConfigEntry):
         payload = {"query": query, "limit": limit}
         # if user_id: payload["user_id"] = user_id
 
+        trace = hass.data[DOMAIN][entry.entry_id]["tracer"].start_trace(f"service.{SERVICE_SEARCH_MEMORY}", limit=limit)
         try:
-            results = await _call_echomind_api(hass, entry.entry_id, "POST", "search", payload) # Asumiendo POST para búsqueda
+            # Las búsquedas tienen prioridad sobre los trabajos en segundo plano
+            async with hass.data[DOMAIN][entry.entry_id]["jobs"].foreground():
+                results = await _call_echomind_api(hass, entry.entry_id, "POST", "search", payload) # Asumiendo POST para búsqueda
+            trace.finish()
             _LOGGER.info(f"Search for '{query}' returned {len(results)} memories from EchoMind.")
+            hass.data[DOMAIN][entry.entry_id]["access"].record_hits(
+                results if isinstance(results, list) else results.get("results", [])
+            )
             hass.bus.async_fire(EVENT_ECHOMIND_SEARCH_RESULTS, {ATTR_QUERY: query, ATTR_RESULTS: results})
             # Para servicios que devuelven datos directamente (SupportsResponse.ONLY):
             return {ATTR_RESULTS: results}
         except HomeAssistantError as e:
+            trace.finish("error")
             _LOGGER.error(f"Failed to search memory via service: {e}")
             return {ATTR_RESULTS: []} # Devolver vacío en caso de error
 
-    async def clear_memory_service(call: ServiceCall):
-        """Service to clear memories from EchoMind."""
+    async def clear_memory_service(call: ServiceCall) -> Dict[str, Any]:
+        """Service to clear memories from EchoMind as a background job (chunked if the addon supports it)."""
         user_id = call.data.get(ATTR_USER_ID)
         days_old = call.data.get(ATTR_DAYS_OLD)
+        chunk_size = call.data[ATTR_CHUNK_SIZE]
         payload = {}
         if user_id: payload["user_id"] = user_id
         if days_old: payload["days_old"] = days_old
@@ -272,16 +406,71 @@ async def async_register_services(hass: HomeAssistant, entry: ConfigEntry):
             _LOGGER.warning("Clear memory service called without any filters (user_id or days_old). This might clear all memories.")
             # Podrías requerir un filtro o una confirmación explícita si no hay filtros
 
-        try:
-            await _call_echomind_api(hass, entry.entry_id, "DELETE", "memories", payload)
-            _LOGGER.info(f"Clear memory request sent to EchoMind with filters: {payload}")
-        except HomeAssistantError as e:
-            _LOGGER.error(f"Failed to clear memory via service: {e}")
+        # Borrado por bloques en segundo plano; el servicio devuelve el id del trabajo inmediatamente
+        jobs: BackgroundJobManager = hass.data[DOMAIN][entry.entry_id]["jobs"]
+        runner = retention_cleanup_runner(
+            functools.partial(_call_echomind_api, hass, entry.entry_id), payload, chunk_size
+        )
+        job_id = jobs.async_start(JOB_TYPE_RETENTION_CLEANUP, runner, {**payload, ATTR_CHUNK_SIZE: chunk_size})
+        _LOGGER.info(f"Clear memory job {job_id} started with filters: {payload}")
+        return {ATTR_JOB_ID: job_id}
+
+    async def get_job_status_service(call: ServiceCall) -> Dict[str, Any]:
+        """Service to query the progress of EchoMind background jobs."""
+        jobs: BackgroundJobManager = hass.data[DOMAIN][entry.entry_id]["jobs"]
+        job_id = call.data.get(ATTR_JOB_ID)
+        if job_id:
+            job = jobs.get(job_id)
+            if job is None:
+                raise HomeAssistantError(f"Unknown EchoMind job id: {job_id}")
+            return {ATTR_JOBS: [job]}
+        return {ATTR_JOBS: jobs.list()}
+
+    async def export_memories_service(call: ServiceCall) -> Dict[str, Any]:
+        """Service to export all memories to an NDJSON file as a background job."""
+        path = validate_backup_path(hass, call.data[ATTR_PATH])
+        cursor = call.data.get(ATTR_CURSOR)
+        chunk_size = call.data[ATTR_CHUNK_SIZE]
+
+        jobs: BackgroundJobManager = hass.data[DOMAIN][entry.entry_id]["jobs"]
+        runner = export_runner(
+            hass, functools.partial(_call_echomind_api, hass, entry.entry_id), path, cursor, chunk_size
+        )
+        job_id = jobs.async_start(JOB_TYPE_EXPORT, runner, {ATTR_PATH: path, ATTR_CURSOR: cursor})
+        return {ATTR_JOB_ID: job_id}
+
+    async def import_memories_service(call: ServiceCall) -> Dict[str, Any]:
+        """Service to import memories from an NDJSON file as a background job."""
+        path = validate_backup_path(hass, call.data[ATTR_PATH])
+        offset = call.data[ATTR_CURSOR]
+        chunk_size = call.data[ATTR_CHUNK_SIZE]
+
+        entry_data = hass.data[DOMAIN][entry.entry_id]
+        runner = import_runner(
+            hass,
+            functools.partial(_call_echomind_api, hass, entry.entry_id),
+            entry_data["access"],
+            path,
+            offset,
+            chunk_size,
+        )
+        job_id = entry_data["jobs"].async_start(JOB_TYPE_IMPORT, runner, {ATTR_PATH: path, ATTR_CURSOR: offset})
+        return {ATTR_JOB_ID: job_id}
+
+    async def get_traces_service(call: ServiceCall) -> Dict[str, Any]:
+        """Service to return the most recent sampled traces, newest first."""
+        tracer: Tracer = hass.data[DOMAIN][entry.entry_id]["tracer"]
+        return {ATTR_TRACES: tracer.traces(call.data.get(ATTR_LIMIT))}
 
     async def get_memory_stats_service(call: ServiceCall) -> Dict[str, Any]:
         """Service to get memory statistics from EchoMind."""
         try:
             stats = await _call_echomind_api(hass, entry.entry_id, "GET", "stats")
+            # Añadir lo que se ha desalojado y las estadísticas de acceso
+            stats["eviction"] = hass.data[DOMAIN][entry.entry_id]["access"].stats()
+            # Tamaños de lote de las escrituras agrupadas de la integración
+            stats["write_batching"] = hass.data[DOMAIN][entry.entry_id]["batcher"].stats()
+            stats["memory_context"] = hass.data[DOMAIN][entry.entry_id]["adaptive"].stats()
             _LOGGER.info(f"Memory stats received from EchoMind: {stats}")
             hass.bus.async_fire(EVENT_ECHOMIND_STATS_UPDATED, stats)
             return stats
@@ -299,7 +488,39 @@ async def async_register_services(hass: HomeAssistant, entry: ConfigEntry):
         search_memory_service, 
         supports_response=SupportsResponse.ONLY # O .OPTIONAL si a veces no devuelve
     )
-    hass.services.async_register(DOMAIN, SERVICE_CLEAR_MEMORY, clear_memory_service)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CLEAR_MEMORY,
+        clear_memory_service,
+        schema=CLEAR_MEMORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_MEMORIES,
+        export_memories_service,
+        schema=EXPORT_MEMORIES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_MEMORIES,
+        import_memories_service,
+        schema=IMPORT_MEMORIES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_JOB_STATUS,
+        get_job_status_service,
+        supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TRACES,
+        get_traces_service,
+        supports_response=SupportsResponse.ONLY
+    )
     hass.services.async_register(
         DOMAIN, 
         SERVICE_GET_MEMORY_STATS, 
@@ -314,4 +535,8 @@ def async_remove_services(hass: HomeAssistant):
     hass.services.async_remove(DOMAIN, SERVICE_SEARCH_MEMORY)
     hass.services.async_remove(DOMAIN, SERVICE_CLEAR_MEMORY)
     hass.services.async_remove(DOMAIN, SERVICE_GET_MEMORY_STATS)
+    hass.services.async_remove(DOMAIN, SERVICE_GET_JOB_STATUS)
+    hass.services.async_remove(DOMAIN, SERVICE_EXPORT_MEMORIES)
+    hass.services.async_remove(DOMAIN, SERVICE_IMPORT_MEMORIES)
+    hass.services.async_remove(DOMAIN, SERVICE_GET_TRACES)
 
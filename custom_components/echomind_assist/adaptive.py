@@ -0,0 +1,125 @@
+"""Adaptive per-query memory context limit.
+
+Instead of always fetching ``memory_context_limit`` memories, the agent asks
+for a small scored candidate set, keeps memories up to a relevance threshold
+or the score "elbow", and only widens the request while scores stay high.
+Scores are assumed to be similarities in [0, 1] where higher is better.
+If the addon returns no scores there is nothing to cut on, so the agent
+falls back to the configured limit.
+"""
+from typing import Any, Dict, List, Optional, Set
+
+from .const import (
+    ADAPTIVE_ELBOW_RATIO,
+    ADAPTIVE_EWMA_ALPHA,
+)
+
+
+def _score(memory: Any) -> Optional[float]:
+    """Return the relevance score of a memory, if the addon provided one."""
+    score = memory.get("score") if isinstance(memory, dict) else None
+    return float(score) if isinstance(score, (int, float)) else None
+
+
+def has_scores(memories: List[Any]) -> bool:
+    """Return True if every memory carries a relevance score."""
+    return all(_score(memory) is not None for memory in memories)
+
+
+def select_relevant(memories: List[Any], threshold: float) -> List[Any]:
+    """Keep memories until the score drops below the threshold or falls off an elbow.
+
+    Results without scores are returned unchanged, since there is nothing to
+    cut on.
+    """
+    if not memories or not has_scores(memories):
+        return memories
+
+    ranked = sorted(memories, key=_score, reverse=True)
+    kept = []
+    previous: Optional[float] = None
+    for memory in ranked:
+        score = _score(memory)
+        if score < threshold:
+            break
+        # Codo: una caída brusca respecto al anterior indica que el resto ya no es relevante
+        if previous is not None and score < previous * ADAPTIVE_ELBOW_RATIO:
+            break
+        kept.append(memory)
+        previous = score
+    return kept
+
+
+def should_widen(candidates: List[Any], kept: List[Any], limit: int, ceiling: int) -> bool:
+    """Widen the request only if every scored candidate was relevant and more may exist.
+
+    Unscored results say nothing about relevance, so they never trigger a
+    second search.
+    """
+    if not candidates or not has_scores(candidates):
+        return False
+    return limit < ceiling and len(candidates) >= limit and len(kept) == len(candidates)
+
+
+class AdaptiveContextStats:
+    """Track what each extra memory costs in latency and prompt size."""
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self._stats: Dict[str, Any] = {
+            "turns": 0,
+            "searches": 0,
+            "widenings": 0,
+            "unscored_turns": 0,
+            "avg_requested": 0.0,
+            "avg_kept": 0.0,
+            "avg_search_ms": 0.0,
+            "latency_ms_per_extra_memory": 0.0,
+            "prompt_chars_per_memory": 0.0,
+            "avg_prompt_chars": 0.0,
+        }
+        self._seeded: Set[str] = set()
+
+    def _ewma(self, key: str, value: float) -> None:
+        """Update an exponentially weighted moving average (seeded by the first sample)."""
+        if key not in self._seeded:
+            self._seeded.add(key)
+            self._stats[key] = value
+        else:
+            self._stats[key] += ADAPTIVE_EWMA_ALPHA * (value - self._stats[key])
+
+    def record_search(self, latency_ms: float) -> None:
+        """Record one search request and its latency."""
+        self._stats["searches"] += 1
+        self._ewma("avg_search_ms", latency_ms)
+
+    def record_widening(self, narrow_limit: int, narrow_ms: float, wide_limit: int, wide_ms: float) -> None:
+        """Record a widened search and the marginal latency of the extra memories it asked for.
+
+        latency / limit would be dominated by the fixed cost of every search
+        (query embedding, round trip); the difference between the narrow and
+        the widened search of the same turn isolates the per-memory cost.
+        """
+        self._stats["widenings"] += 1
+        if wide_limit > narrow_limit:
+            self._ewma("latency_ms_per_extra_memory", (wide_ms - narrow_ms) / (wide_limit - narrow_limit))
+
+    def record_unscored(self) -> None:
+        """Record a turn whose results had no scores (adaptive cut skipped)."""
+        self._stats["unscored_turns"] += 1
+
+    def record_turn(self, requested: int, kept: int) -> None:
+        """Record how many memories a turn requested and kept."""
+        self._stats["turns"] += 1
+        self._ewma("avg_requested", requested)
+        self._ewma("avg_kept", kept)
+
+    def record_prompt(self, prompt_chars: int, kept: int) -> None:
+        """Record the prompt size added by the memory context of a turn."""
+        self._ewma("avg_prompt_chars", prompt_chars)
+        if kept:
+            self._ewma("prompt_chars_per_memory", prompt_chars / kept)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the statistics, rounded for display."""
+        return {key: round(value, 2) if isinstance(value, float) else value for key, value in self._stats.items()}
@@ -0,0 +1,140 @@
+"""Streaming NDJSON export/import of EchoMind memories.
+
+Memories are moved one chunk at a time, so backing up or migrating a large
+store runs in constant memory. Both directions are resumable: export through
+the addon's pagination cursor, import through a byte offset into the file.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    BACKUP_ALLOWED_DIRS,
+    DEFAULT_TRANSFER_CHUNK_SIZE,
+)
+from .eviction import MemoryAccessTracker
+from .jobs import BackgroundJobManager, JobRunner
+from .retention import ApiCaller
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def validate_backup_path(hass: HomeAssistant, path: str) -> str:
+    """Return the resolved path if it is inside /share or /backup."""
+    resolved = os.path.realpath(path)
+    if not any(resolved.startswith(f"{allowed}/") for allowed in BACKUP_ALLOWED_DIRS):
+        raise HomeAssistantError(f"Path must be inside {' or '.join(BACKUP_ALLOWED_DIRS)}: {path}")
+    if not hass.config.is_allowed_path(resolved):
+        raise HomeAssistantError(
+            f"Path is not in allowlist_external_dirs; add its directory under `homeassistant: allowlist_external_dirs` "
+            f"in configuration.yaml: {path}"
+        )
+    return resolved
+
+
+def _append_ndjson(path: str, records: List[Dict[str, Any]], truncate: bool) -> None:
+    """Write records as NDJSON lines (runs in the executor)."""
+    if truncate:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w" if truncate else "a", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False))
+            file.write("\n")
+
+
+def _read_ndjson_chunk(path: str, offset: int, max_records: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Read up to ``max_records`` NDJSON records from a byte offset (runs in the executor)."""
+    records: List[Dict[str, Any]] = []
+    with open(path, "rb") as file:
+        file.seek(offset)
+        while len(records) < max_records:
+            line = file.readline()
+            if not line:
+                break
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+        return records, file.tell()
+
+
+def export_runner(
+    hass: HomeAssistant,
+    api_call: ApiCaller,
+    path: str,
+    cursor: Optional[str] = None,
+    chunk_size: int = DEFAULT_TRANSFER_CHUNK_SIZE,
+) -> JobRunner:
+    """Build a job that streams all memories from the addon into an NDJSON file.
+
+    Pages come from ``GET /api/memories/export`` as ``{"memories": [...],
+    "next_cursor": ...}``. Without a cursor the file is rewritten from scratch;
+    with one, the export resumes and appends.
+    """
+
+    async def _run(manager: BackgroundJobManager, job_id: str) -> Dict[str, Any]:
+        nonlocal cursor
+        exported = 0
+        truncate = cursor is None
+        while True:
+            await manager.async_yield_to_foreground()
+            params: Dict[str, Any] = {"limit": chunk_size}
+            if cursor:
+                params["cursor"] = cursor
+            page = await api_call("GET", "memories/export", params)
+            memories = page.get("memories", [])
+            if memories or truncate:
+                await hass.async_add_executor_job(_append_ndjson, path, memories, truncate)
+                truncate = False
+            exported += len(memories)
+            cursor = page.get("next_cursor")
+            # El cursor permite reanudar la exportación si el trabajo se interrumpe
+            manager.update_progress(job_id, exported=exported, cursor=cursor)
+            if not cursor or not memories:
+                break
+
+        _LOGGER.info(f"Exported {exported} EchoMind memories to {path}")
+        return {"path": path, "exported": exported}
+
+    return _run
+
+
+def import_runner(
+    hass: HomeAssistant,
+    api_call: ApiCaller,
+    tracker: MemoryAccessTracker,
+    path: str,
+    offset: int = 0,
+    chunk_size: int = DEFAULT_TRANSFER_CHUNK_SIZE,
+) -> JobRunner:
+    """Build a job that streams memories from an NDJSON file into the addon.
+
+    Each chunk goes to ``POST /api/memories/import`` with ``on_conflict: skip``
+    so memories whose id already exists are not duplicated.
+    """
+
+    async def _run(manager: BackgroundJobManager, job_id: str) -> Dict[str, Any]:
+        nonlocal offset
+        imported = 0
+        skipped = 0
+        while True:
+            await manager.async_yield_to_foreground()
+            records, next_offset = await hass.async_add_executor_job(_read_ndjson_chunk, path, offset, chunk_size)
+            if not records:
+                break
+            result = await api_call("POST", "memories/import", {"memories": records, "on_conflict": "skip"})
+            imported += result.get("imported", len(records))
+            skipped += result.get("skipped", 0)
+            for record in records:
+                tracker.record_added(record.get("id"))
+            offset = next_offset
+            # El offset en bytes permite reanudar la importación donde se quedó
+            manager.update_progress(job_id, imported=imported, skipped=skipped, cursor=offset)
+
+        _LOGGER.info(f"Imported {imported} EchoMind memories from {path} ({skipped} duplicates skipped)")
+        return {"path": path, "imported": imported, "skipped": skipped}
+
+    return _run
@@ -0,0 +1,150 @@
+"""Group-commit batching of memory writes to the EchoMind addon.
+
+Interactions stored by the conversation agent are queued and sent together
+after a short window (or once the batch is full), so the addon can compute
+embeddings and upsert vectors for many memories in one go instead of one
+request per turn.
+
+If the addon answers the batch endpoint with 404/405 the batcher remembers
+it and sends single writes from then on. Other failures (timeouts, server
+errors) are not retried one by one, since the addon may already have stored
+the batch and a replay would duplicate memories.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    DOMAIN,
+    WRITE_BATCH_WINDOW,
+    WRITE_BATCH_MAX_SIZE,
+)
+from .errors import EchoMindApiError
+from .eviction import MemoryAccessTracker
+from .retention import ApiCaller
+from .tracing import detach
+
+_LOGGER = logging.getLogger(__name__)
+
+# Respuestas que indican con certeza que el addon no tiene el endpoint de lotes
+BATCH_UNSUPPORTED_STATUSES = (404, 405)
+
+
+class WriteBatcher:
+    """Queue memory writes and flush them as batches."""
+
+    def __init__(self, hass: HomeAssistant, api_call: ApiCaller, tracker: MemoryAccessTracker) -> None:
+        """Initialize the batcher."""
+        self.hass = hass
+        self._api_call = api_call
+        self._tracker = tracker
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        self._batch_supported: Optional[bool] = None # None hasta la primera respuesta del addon
+        self._stats: Dict[str, Any] = {
+            "batches": 0,
+            "memories": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "fallbacks": 0,
+            "failed": 0,
+        }
+
+    @callback
+    def add(self, payload: Dict[str, Any]) -> None:
+        """Queue a memory; the turn does not wait for it to be indexed."""
+        self._pending.append(payload)
+        if len(self._pending) >= WRITE_BATCH_MAX_SIZE:
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_later(WRITE_BATCH_WINDOW, self._start_flush)
+
+    @callback
+    def _start_flush(self) -> None:
+        """Flush the pending batch in a background task."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        task = self.hass.async_create_background_task(self.async_flush(), name=f"{DOMAIN} write batch")
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def async_flush(self) -> None:
+        """Send all pending memories to the addon in one request."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # El lote mezcla varios turnos y sobrevive al que lo disparó: no añadir spans a su traza
+        with detach():
+            await self._async_send(batch)
+
+    async def _async_send(self, batch: List[Dict[str, Any]]) -> None:
+        """Store one batch, falling back to single writes if batches are unsupported."""
+        if self._batch_supported is False:
+            memory_ids = await self._async_write_singles(batch)
+        else:
+            try:
+                result = await self._api_call("POST", "memories/batch", {"memories": batch})
+                memory_ids = result.get("ids", [])
+                self._batch_supported = True
+            except EchoMindApiError as e:
+                if e.status not in BATCH_UNSUPPORTED_STATUSES:
+                    self._record_failed_batch(batch, e)
+                    return
+                # El addon no tiene el endpoint de lotes: recordarlo y escribir una a una
+                _LOGGER.info("EchoMind addon does not support batch writes; storing memories one at a time")
+                self._batch_supported = False
+                self._stats["fallbacks"] += 1
+                memory_ids = await self._async_write_singles(batch)
+            except HomeAssistantError as e:
+                # Tras un timeout el addon puede haber guardado el lote: no reenviarlo
+                self._record_failed_batch(batch, e)
+                return
+
+        for memory_id in memory_ids:
+            self._tracker.record_added(memory_id)
+        self._stats["batches"] += 1
+        self._stats["memories"] += len(batch)
+        self._stats["last_batch_size"] = len(batch)
+        self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+        _LOGGER.debug(f"Flushed a batch of {len(batch)} memories to EchoMind")
+
+    async def _async_write_singles(self, batch: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Store memories one request at a time."""
+        memory_ids = []
+        for payload in batch:
+            try:
+                memory_ids.append((await self._api_call("POST", "memories", payload)).get("id"))
+            except HomeAssistantError as e:
+                self._stats["failed"] += 1
+                _LOGGER.warning(f"Failed to store interaction: {e}")
+        return memory_ids
+
+    def _record_failed_batch(self, batch: List[Dict[str, Any]], error: HomeAssistantError) -> None:
+        """Count a batch that could not be stored (and is not retried)."""
+        self._stats["failed"] += len(batch)
+        _LOGGER.warning(f"Failed to store a batch of {len(batch)} interactions: {error}")
+
+    async def async_shutdown(self) -> None:
+        """Wait for in-flight flushes and store whatever is still queued."""
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self.async_flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batching statistics."""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "batch_supported": self._batch_supported,
+            "avg_batch_size": round(self._stats["memories"] / batches, 2) if batches else 0,
+        }
@@ -20,12 +20,29 @@ from .const import (
     CONF_MEMORY_CONTEXT_LIMIT,
     CONF_AUTO_STORE_CONVERSATIONS,
     CONF_ENABLE_DEBUG_LOGGING,
+    CONF_ACTIVE_ADDON_URL,
+    CONF_ENABLE_EVICTION,
+    CONF_MAX_MEMORIES,
+    CONF_EVICTION_POLICY,
+    CONF_RECORD_TRACES,
+    CONF_ADAPTIVE_CONTEXT,
+    CONF_RELEVANCE_THRESHOLD,
+    CONF_TRACE_SAMPLE_RATE,
     DEFAULT_ECHOMIND_ADDON_URL,
     DEFAULT_MEMORY_CONTEXT_LIMIT,
     DEFAULT_AUTO_STORE_CONVERSATIONS,
     DEFAULT_ENABLE_DEBUG_LOGGING,
+    DEFAULT_ENABLE_EVICTION,
+    DEFAULT_MAX_MEMORIES,
+    DEFAULT_EVICTION_POLICY,
+    EVICTION_POLICIES,
+    DEFAULT_RECORD_TRACES,
+    DEFAULT_ADAPTIVE_CONTEXT,
+    DEFAULT_RELEVANCE_THRESHOLD,
+    DEFAULT_TRACE_SAMPLE_RATE,
     NO_BASE_AGENT_SELECTED
 )
+from .discovery import async_discover_routes, fastest_healthy_route
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -82,8 +99,16 @@ class EchoMindAssistConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             addon_url = user_input.get(CONF_ECHOMIND_ADDON_URL, DEFAULT_ECHOMIND_ADDON_URL).rstrip('/')
-            validation_errors = await validate_addon_connection(self.hass, addon_url)
-            errors.update(validation_errors)
+            # Sondear todas las rutas candidatas en paralelo y quedarse con la más rápida
+            routes = await async_discover_routes(self.hass, addon_url)
+            active_url = fastest_healthy_route(routes)
+            if active_url:
+                _LOGGER.info(f"Fastest healthy route to EchoMind addon: {active_url}")
+            else:
+                # Ninguna ruta respondió a /api/health; validar la URL indicada para dar un error preciso
+                validation_errors = await validate_addon_connection(self.hass, addon_url)
+                errors.update(validation_errors)
+                active_url = addon_url
 
             if not errors:
                 # Ensure unique instance
@@ -91,7 +116,9 @@ class EchoMindAssistConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 self._abort_if_unique_id_configured()
 
                 _LOGGER.info(f"Creating EchoMind Assist config entry with data: {user_input}")
-                return self.async_create_entry(title=APP_NAME, data=user_input)
+                return self.async_create_entry(
+                    title=APP_NAME, data={**user_input, CONF_ACTIVE_ADDON_URL: active_url}
+                )
 
         # Get available conversation agents for the base_agent dropdown
         # This is a simplified way; a more robust way might involve a helper function
@@ -115,6 +142,14 @@ class EchoMindAssistConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_MEMORY_CONTEXT_LIMIT,
                     default=user_input.get(CONF_MEMORY_CONTEXT_LIMIT, DEFAULT_MEMORY_CONTEXT_LIMIT) if user_input else DEFAULT_MEMORY_CONTEXT_LIMIT,
                 ): cv.positive_int,
+                vol.Optional(
+                    CONF_ADAPTIVE_CONTEXT,
+                    default=user_input.get(CONF_ADAPTIVE_CONTEXT, DEFAULT_ADAPTIVE_CONTEXT) if user_input else DEFAULT_ADAPTIVE_CONTEXT,
+                ): cv.boolean, # Con el modo adaptativo, memory_context_limit es el máximo
+                vol.Optional(
+                    CONF_RELEVANCE_THRESHOLD,
+                    default=user_input.get(CONF_RELEVANCE_THRESHOLD, DEFAULT_RELEVANCE_THRESHOLD) if user_input else DEFAULT_RELEVANCE_THRESHOLD,
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
                 vol.Optional(
                     CONF_AUTO_STORE_CONVERSATIONS,
                     default=user_input.get(CONF_AUTO_STORE_CONVERSATIONS, DEFAULT_AUTO_STORE_CONVERSATIONS) if user_input else DEFAULT_AUTO_STORE_CONVERSATIONS,
@@ -122,6 +157,26 @@ class EchoMindAssistConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(
                     CONF_ENABLE_DEBUG_LOGGING,
                     default=user_input.get(CONF_ENABLE_DEBUG_LOGGING, DEFAULT_ENABLE_DEBUG_LOGGING) if user_input else DEFAULT_ENABLE_DEBUG_LOGGING,
+                ): cv.boolean, # Traza todos los turnos (equivale a trace_sample_rate = 1)
+                vol.Optional(
+                    CONF_TRACE_SAMPLE_RATE,
+                    default=user_input.get(CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE) if user_input else DEFAULT_TRACE_SAMPLE_RATE,
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+                vol.Optional(
+                    CONF_ENABLE_EVICTION,
+                    default=user_input.get(CONF_ENABLE_EVICTION, DEFAULT_ENABLE_EVICTION) if user_input else DEFAULT_ENABLE_EVICTION,
+                ): cv.boolean, # Requiere que el addon anuncie borrado y listado por id
+                vol.Optional(
+                    CONF_MAX_MEMORIES,
+                    default=user_input.get(CONF_MAX_MEMORIES, DEFAULT_MAX_MEMORIES) if user_input else DEFAULT_MAX_MEMORIES,
+                ): vol.All(vol.Coerce(int), vol.Range(min=100, max=50000)), # Mismo rango que el addon
+                vol.Optional(
+                    CONF_EVICTION_POLICY,
+                    default=user_input.get(CONF_EVICTION_POLICY, DEFAULT_EVICTION_POLICY) if user_input else DEFAULT_EVICTION_POLICY,
+                ): vol.In(EVICTION_POLICIES),
+                vol.Optional(
+                    CONF_RECORD_TRACES,
+                    default=user_input.get(CONF_RECORD_TRACES, DEFAULT_RECORD_TRACES) if user_input else DEFAULT_RECORD_TRACES,
                 ): cv.boolean,
             }
         )
@@ -9,23 +9,105 @@ CONF_BASE_CONVERSATION_AGENT = "base_conversation_agent" # Renamed for clarity
 CONF_MEMORY_CONTEXT_LIMIT = "memory_context_limit"
 CONF_AUTO_STORE_CONVERSATIONS = "auto_store_conversations" # Renamed for clarity
 CONF_ENABLE_DEBUG_LOGGING = "enable_debug_logging" # New option for verbose logging
+CONF_ACTIVE_ADDON_URL = "active_addon_url" # Fastest healthy route found by endpoint discovery
+CONF_ENABLE_EVICTION = "enable_eviction" # Opt-in: requires delete-by-id and id listing in the addon
+CONF_MAX_MEMORIES = "max_memories" # Cap enforced by access-aware eviction
+CONF_EVICTION_POLICY = "eviction_policy"
+CONF_RECORD_TRACES = "record_traces" # Opt-in recorder of turn traces (query text included) for replay
+CONF_ADAPTIVE_CONTEXT = "adaptive_context" # Adapt the memory limit per query from relevance scores
+CONF_RELEVANCE_THRESHOLD = "relevance_threshold"
+CONF_TRACE_SAMPLE_RATE = "trace_sample_rate" # Fracción de turnos que se trazan
 
 # Default values
 DEFAULT_ECHOMIND_ADDON_URL = "http://echomind.local.hass.io:8765" # Using .local.hass.io for supervisor DNS
 DEFAULT_MEMORY_CONTEXT_LIMIT = 5
 DEFAULT_AUTO_STORE_CONVERSATIONS = True
 DEFAULT_ENABLE_DEBUG_LOGGING = False
+DEFAULT_ENABLE_EVICTION = False
+DEFAULT_MAX_MEMORIES = 10000 # Igual que la opción max_memories del addon
+DEFAULT_RECORD_TRACES = False
+DEFAULT_ADAPTIVE_CONTEXT = False
+DEFAULT_RELEVANCE_THRESHOLD = 0.35
+DEFAULT_TRACE_SAMPLE_RATE = 0.05
+
+# Endpoint discovery (candidate routes to the addon, probed concurrently)
+ADDON_SLUG = "echomind"
+ADDON_API_PORT = 8765
+SUPERVISOR_DNS_ADDON_URL = f"http://echomind.local.hass.io:{ADDON_API_PORT}"
+LOCALHOST_ADDON_URL = f"http://localhost:{ADDON_API_PORT}" # Puerto mapeado en el host
+ROUTE_PROBE_TIMEOUT = 3 # Segundos por sonda; todas corren en paralelo
+ROUTE_PROBE_INTERVAL = 600 # Segundos entre re-evaluaciones en segundo plano
+# Histéresis: solo cambiar de una ruta sana si la otra es claramente más rápida (ambas condiciones)
+ROUTE_SWITCH_MIN_GAIN_MS = 5.0
+ROUTE_SWITCH_MAX_RATIO = 0.7 # La nueva ruta debe tardar como mucho el 70% de la actual
+ADDON_STATUS_WARMING_UP = "warming_up" # Estado de /api/health mientras la app calienta sus índices
+# Capacidades que el addon anuncia en la lista `capabilities` de /api/health
+ADDON_CAPABILITY_DELETE_BY_ID = "delete_memories_by_id" # DELETE /api/memories con {"memory_ids": [...]} -> {"deleted_ids": [...]}
+ADDON_CAPABILITY_LIST_IDS = "list_memory_ids" # GET /api/memories/ids -> {"memories": [{"id", "created_at"}]}
+
+# Background jobs (retention cleanup, etc.)
+DEFAULT_CLEANUP_CHUNK_SIZE = 200 # Memorias borradas por bloque
+DEFAULT_CLEANUP_CHUNK_INTERVAL = 1.0 # Segundos de pausa entre bloques (rate limit)
+MAX_TRACKED_JOBS = 20 # Trabajos terminados que se recuerdan para consultas de estado
+JOB_STATE_RUNNING = "running"
+JOB_STATE_COMPLETED = "completed"
+JOB_STATE_FAILED = "failed"
+JOB_STATE_CANCELLED = "cancelled"
+JOB_TYPE_RETENTION_CLEANUP = "retention_cleanup"
+JOB_TYPE_EVICTION = "eviction"
+JOB_TYPE_EXPORT = "export"
+JOB_TYPE_IMPORT = "import"
+
+# Streaming NDJSON export/import
+BACKUP_ALLOWED_DIRS = ("/share", "/backup")
+DEFAULT_EXPORT_PATH = "/backup/echomind_memories.ndjson"
+DEFAULT_TRANSFER_CHUNK_SIZE = 500 # Memorias por página/bloque de export/import
+
+# Turn trace recorder (replayed with tools/replay_traces.py)
+TRACE_DIR = "echomind_traces" # Relativo al directorio de configuración de HA
+TRACE_FILE_NAME = "traces.ndjson"
+TRACE_FILE_MAX_BYTES = 5 * 1024 * 1024 # Rotar a los 5 MB
+TRACE_FILE_BACKUP_COUNT = 3
+
+# Group-commit batching of memory writes (POST /api/memories/batch)
+WRITE_BATCH_WINDOW = 2.0 # Segundos que se acumulan escrituras antes de enviarlas
+WRITE_BATCH_MAX_SIZE = 16 # Enviar antes si el lote se llena
+
+# Adaptive memory context limit (memory_context_limit acts as the ceiling)
+ADAPTIVE_INITIAL_LIMIT = 3 # Candidatos pedidos en la primera búsqueda
+ADAPTIVE_ELBOW_RATIO = 0.6 # Cortar si una puntuación cae por debajo del 60% de la anterior
+ADAPTIVE_EWMA_ALPHA = 0.2 # Suavizado de las medias de coste por memoria
+
+# Sampled tracing
+TRACE_BUFFER_SIZE = 50 # Trazas recientes guardadas en memoria (get_traces / diagnósticos)
+
+# Access-aware eviction for the max_memories cap
+EVICTION_POLICY_LFU = "lfu"
+EVICTION_POLICY_LRU = "lru"
+EVICTION_POLICY_AGE_WEIGHTED = "age_weighted"
+EVICTION_POLICIES = [EVICTION_POLICY_LFU, EVICTION_POLICY_LRU, EVICTION_POLICY_AGE_WEIGHTED]
+DEFAULT_EVICTION_POLICY = EVICTION_POLICY_AGE_WEIGHTED
+EVICTION_AGE_HALF_LIFE_DAYS = 14 # Vida media de un acierto en la política age_weighted
+EVICTION_LOW_WATERMARK = 0.95 # Desalojar hasta el 95% del límite
+EVICTION_INTERVAL = 3600 # Segundos entre pasadas de desalojo en segundo plano
+ACCESS_STORAGE_VERSION = 1
+ACCESS_SAVE_DELAY = 30 # Segundos para agrupar escrituras de estadísticas de acceso
 
 # Service names
 SERVICE_ADD_MEMORY = "add_memory"
 SERVICE_SEARCH_MEMORY = "search_memory"
 SERVICE_CLEAR_MEMORY = "clear_memory"
 SERVICE_GET_MEMORY_STATS = "get_memory_stats" # New service example
+SERVICE_GET_JOB_STATUS = "get_job_status"
+SERVICE_EXPORT_MEMORIES = "export_memories"
+SERVICE_IMPORT_MEMORIES = "import_memories"
+SERVICE_GET_TRACES = "get_traces"
 
 # Event types
 EVENT_ECHOMIND_MEMORY_ADDED = f"{DOMAIN}_memory_added"
 EVENT_ECHOMIND_SEARCH_RESULTS = f"{DOMAIN}_search_results"
 EVENT_ECHOMIND_STATS_UPDATED = f"{DOMAIN}_stats_updated"
+EVENT_ECHOMIND_JOB_PROGRESS = f"{DOMAIN}_job_progress"
 
 # Attributes
 ATTR_TEXT = "text"
@@ -38,6 +120,12 @@ ATTR_RESULTS = "results"
 ATTR_MEMORY_ID = "memory_id"
 ATTR_TOTAL_MEMORIES = "total_memories"
 ATTR_LAST_UPDATED = "last_updated"
+ATTR_JOB_ID = "job_id"
+ATTR_JOBS = "jobs"
+ATTR_CHUNK_SIZE = "chunk_size"
+ATTR_PATH = "path"
+ATTR_CURSOR = "cursor"
+ATTR_TRACES = "traces"
 
 # Other constants
 APP_NAME = "EchoMind Assist"
@@ -1,7 +1,10 @@
 """Conversation agent for EchoMind Assist integration."""
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import dataclasses # Para dataclasses.replace
+import json
+import time
 
 import aiohttp
 import async_timeout
@@ -20,12 +23,22 @@ from .const import (
     CONF_BASE_CONVERSATION_AGENT,
     CONF_MEMORY_CONTEXT_LIMIT,
     CONF_AUTO_STORE_CONVERSATIONS,
-    CONF_ENABLE_DEBUG_LOGGING, # Para logs del agente
+    CONF_ACTIVE_ADDON_URL,
+    CONF_RECORD_TRACES,
+    CONF_ADAPTIVE_CONTEXT,
+    CONF_RELEVANCE_THRESHOLD,
     DEFAULT_ECHOMIND_ADDON_URL,
     DEFAULT_MEMORY_CONTEXT_LIMIT,
     DEFAULT_AUTO_STORE_CONVERSATIONS,
+    DEFAULT_RECORD_TRACES,
+    DEFAULT_ADAPTIVE_CONTEXT,
+    DEFAULT_RELEVANCE_THRESHOLD,
+    ADAPTIVE_INITIAL_LIMIT,
     NO_BASE_AGENT_SELECTED
 )
+from .adaptive import AdaptiveContextStats, has_scores, select_relevant, should_widen
+from .recorder import TraceRecorder
+from .tracing import NOOP_TRACE, Tracer, current_trace
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -55,32 +68,40 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
         self._memory_context_limit: int = DEFAULT_MEMORY_CONTEXT_LIMIT
         self._auto_store: bool = DEFAULT_AUTO_STORE_CONVERSATIONS
         self._base_agent: Optional[conversation.AbstractConversationAgent] = None
-        self._debug_logging: bool = False
+        self._tracer: Optional[Tracer] = None
+        self._recorder: Optional[TraceRecorder] = None
+        self._adaptive_context: bool = DEFAULT_ADAPTIVE_CONTEXT
+        self._relevance_threshold: float = DEFAULT_RELEVANCE_THRESHOLD
+        self._adaptive_stats: Optional[AdaptiveContextStats] = None
 
     async def async_initialize(self) -> None:
         """Initialize the agent asynchronously after creation."""
         config = self.entry.data
         options = self.entry.options # Usar opciones si existen (de OptionsFlow)
 
-        self._addon_url = options.get(CONF_ECHOMIND_ADDON_URL, config.get(CONF_ECHOMIND_ADDON_URL, DEFAULT_ECHOMIND_ADDON_URL)).rstrip('/')
+        self._addon_url = options.get(
+            CONF_ECHOMIND_ADDON_URL,
+            config.get(CONF_ACTIVE_ADDON_URL, config.get(CONF_ECHOMIND_ADDON_URL, DEFAULT_ECHOMIND_ADDON_URL))
+        ).rstrip('/')
         self._base_agent_id = options.get(CONF_BASE_CONVERSATION_AGENT, config.get(CONF_BASE_CONVERSATION_AGENT))
         self._memory_context_limit = options.get(CONF_MEMORY_CONTEXT_LIMIT, config.get(CONF_MEMORY_CONTEXT_LIMIT, DEFAULT_MEMORY_CONTEXT_LIMIT))
         self._auto_store = options.get(CONF_AUTO_STORE_CONVERSATIONS, config.get(CONF_AUTO_STORE_CONVERSATIONS, DEFAULT_AUTO_STORE_CONVERSATIONS))
-        self._debug_logging = options.get(CONF_ENABLE_DEBUG_LOGGING, config.get(CONF_ENABLE_DEBUG_LOGGING, False))
+        self._adaptive_context = options.get(CONF_ADAPTIVE_CONTEXT, config.get(CONF_ADAPTIVE_CONTEXT, DEFAULT_ADAPTIVE_CONTEXT))
+        self._relevance_threshold = options.get(CONF_RELEVANCE_THRESHOLD, config.get(CONF_RELEVANCE_THRESHOLD, DEFAULT_RELEVANCE_THRESHOLD))
+        # Coste de cada memoria extra (latencia y tamaño del prompt), compartido con get_memory_stats
+        self._adaptive_stats = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("adaptive")
+        if options.get(CONF_RECORD_TRACES, config.get(CONF_RECORD_TRACES, DEFAULT_RECORD_TRACES)):
+            # Los ids se anonimizan con una sal local (el entry_id no sale de esta instalación)
+            self._recorder = TraceRecorder(self.hass, self.entry.entry_id)
 
-        if self._debug_logging:
-            _LOGGER.setLevel(logging.DEBUG)
-            _LOGGER.debug("Debug logging enabled for EchoMindConversationAgent")
-        else:
-            # Restablecer al nivel de log del logger principal si el debug está desactivado
-            # Esto asume que el logger principal (en __init__) controla el nivel base.
-            # O puedes fijarlo a logging.INFO aquí.
-            parent_logger_level = logging.getLogger(f"custom_components.{DOMAIN}").getEffectiveLevel()
-            _LOGGER.setLevel(parent_logger_level if parent_logger_level != logging.NOTSET else logging.INFO)
+        # El nivel de log lo controla la configuración `logger:` de HA; el detalle por turno va a las trazas
+        self._tracer = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("tracer")
 
         _LOGGER.debug(
-            f"EchoMind Agent Initializing: Addon URL='{self._addon_url}', Base Agent ID='{self._base_agent_id}', "
-            f"Context Limit={self._memory_context_limit}, Auto Store={self._auto_store}, Debug Logging={self._debug_logging}"
+            "EchoMind Agent Initializing: Addon URL='%s', Base Agent ID='%s', Context Limit=%s, Auto Store=%s, "
+            "Trace Sample Rate=%s",
+            self._addon_url, self._base_agent_id, self._memory_context_limit, self._auto_store,
+            self._tracer.sample_rate if self._tracer else None,
         )
 
         if self._base_agent_id and self._base_agent_id != NO_BASE_AGENT_SELECTED:
@@ -111,14 +132,43 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
         self, user_input: conversation.ConversationInput
     ) -> conversation.ConversationResult:
         """Process a sentence."""
-        if self._debug_logging:
-            _LOGGER.debug(f"Input to EchoMind Agent: Text='{user_input.text}', ConvID='{user_input.conversation_id}', DeviceID='{user_input.device_id}')
+        # Una traza muestreada por turno; los turnos no muestreados reciben una traza no-op sin coste
+        trace = (
+            self._tracer.start_trace(
+                "conversation.turn",
+                conversation_id=user_input.conversation_id,
+                device_id=user_input.device_id,
+                language=user_input.language,
+            )
+            if self._tracer else NOOP_TRACE
+        )
+        try:
+            result = await self._async_process_turn(user_input, trace)
+        except Exception:
+            trace.finish("error")
+            raise
+        trace.finish()
+        return result
+
+    async def _async_process_turn(
+        self, user_input: conversation.ConversationInput, trace: Any
+    ) -> conversation.ConversationResult:
+        """Retrieve memory context, run the base agent and store the interaction."""
+        if trace:
+            trace.event("input", text=user_input.text)
+
+        turn_start = time.monotonic()
+        arrived_at = time.time() # Hora de llegada del turno (la reproducción programa por llegada)
+        timings: Dict[str, float] = {}
 
         # 1. Recuperar memorias relevantes
-        relevant_memories = await self._get_relevant_memories(
-            user_input.text, 
-            user_input.conversation_id
-        )
+        stage_start = time.monotonic()
+        with trace.span("retrieval"):
+            relevant_memories, searches = await self._get_relevant_memories(
+                user_input.text, 
+                user_input.conversation_id
+            )
+        timings["retrieval_ms"] = _elapsed_ms(stage_start)
 
         # 2. Enriquecer el prompt/input con el contexto de memoria
         # Esto es para el LLM del agente base. Si no hay agente base, EchoMind podría usar esto directamente.
@@ -127,66 +177,129 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
         # Crear una nueva instancia de ConversationInput con el texto modificado
         # Esto es importante para no modificar el objeto original si se reutiliza
         enhanced_user_input = dataclasses.replace(user_input, text=processed_input_text)
+        if self._adaptive_stats:
+            self._adaptive_stats.record_prompt(len(processed_input_text) - len(user_input.text), len(relevant_memories))
 
-        if self._debug_logging:
-            _LOGGER.debug(f"Enhanced text for LLM: {enhanced_user_input.text}")
+        if trace:
+            trace.event("prompt", memories=len(relevant_memories), text=enhanced_user_input.text)
 
         # 3. Procesar con el agente base (LLM) si está configurado
-        if self._base_agent:
-            try:
-                # Pasar el input enriquecido al agente base
-                result = await self._base_agent.async_process(enhanced_user_input)
-            except Exception as e:
-                _LOGGER.error(f"Error processing with base agent '{self._base_agent_id}': {e}")
-                # Fallback a una respuesta directa de EchoMind o error
+        stage_start = time.monotonic()
+        with trace.span("base_agent", agent_id=self._base_agent_id):
+            if self._base_agent:
+                try:
+                    # Pasar el input enriquecido al agente base
+                    result = await self._base_agent.async_process(enhanced_user_input)
+                except Exception as e:
+                    _LOGGER.error(f"Error processing with base agent '{self._base_agent_id}': {e}")
+                    # Fallback a una respuesta directa de EchoMind o error
+                    intent_response = conversation.IntentResponse(language=user_input.language)
+                    intent_response.async_set_error(
+                        conversation.IntentResponseErrorCode.UNKNOWN,
+                        f"Error in base agent: {e}"
+                    )
+                    result = conversation.ConversationResult(
+                        response=intent_response, conversation_id=user_input.conversation_id
+                    )
+            else:
+                # No hay agente base, EchoMind podría intentar responder directamente o indicar que no puede
+                _LOGGER.info("No base agent, EchoMind direct response (not fully implemented in this example).")
                 intent_response = conversation.IntentResponse(language=user_input.language)
-                intent_response.async_set_error(
-                    conversation.IntentResponseErrorCode.UNKNOWN,
-                    f"Error in base agent: {e}"
+                intent_response.async_set_speech(
+                    f"EchoMind received: '{user_input.text}'. Memory context was considered. (Direct LLM response not implemented)"
                 )
+                # Aquí podrías hacer una llamada a tu addon para que un LLM procese `enhanced_user_input.text`
+                # direct_llm_response = await self._call_echomind_llm(enhanced_user_input.text)
+                # intent_response.async_set_speech(direct_llm_response)
                 result = conversation.ConversationResult(
                     response=intent_response, conversation_id=user_input.conversation_id
                 )
-        else:
-            # No hay agente base, EchoMind podría intentar responder directamente o indicar que no puede
-            _LOGGER.info("No base agent, EchoMind direct response (not fully implemented in this example).")
-            intent_response = conversation.IntentResponse(language=user_input.language)
-            intent_response.async_set_speech(
-                f"EchoMind received: '{user_input.text}'. Memory context was considered. (Direct LLM response not implemented)"
-            )
-            # Aquí podrías hacer una llamada a tu addon para que un LLM procese `enhanced_user_input.text`
-            # direct_llm_response = await self._call_echomind_llm(enhanced_user_input.text)
-            # intent_response.async_set_speech(direct_llm_response)
-            result = conversation.ConversationResult(
-                response=intent_response, conversation_id=user_input.conversation_id
-            )
+
+        timings["base_agent_ms"] = _elapsed_ms(stage_start)
+
+        assistant_response_text = ""
+        if result.response.speech:
+             # Intentar obtener la parte "plain" o la primera respuesta de voz disponible
+            speech_parts = result.response.speech.get("plain", result.response.speech)
+            if isinstance(speech_parts, dict):
+                assistant_response_text = speech_parts.get("speech", "")
+            elif isinstance(speech_parts, str): # Si es una cadena directa (menos común)
+                assistant_response_text = speech_parts
+
+        if not assistant_response_text and result.response.error_code:
+            assistant_response_text = f"Error from LLM: {result.response.error_code}"
 
         # 4. Almacenar nueva información en memoria (si está habilitado)
+        store_batched = bool(self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("batcher"))
         if self._auto_store:
-            assistant_response_text = ""
-            if result.response.speech:
-                 # Intentar obtener la parte "plain" o la primera respuesta de voz disponible
-                speech_parts = result.response.speech.get("plain", result.response.speech)
-                if isinstance(speech_parts, dict):
-                    assistant_response_text = speech_parts.get("speech", "")
-                elif isinstance(speech_parts, str): # Si es una cadena directa (menos común)
-                    assistant_response_text = speech_parts
-            
-            if not assistant_response_text and result.response.error_code:
-                assistant_response_text = f"Error from LLM: {result.response.error_code}"
-
-            await self._store_interaction(
-                user_input.text,
+            stage_start = time.monotonic()
+            with trace.span("store"):
+                await self._store_interaction(
+                    user_input.text,
+                    assistant_response_text,
+                    user_input.conversation_id,
+                    user_input.device_id
+                )
+            timings["store_ms"] = _elapsed_ms(stage_start)
+        timings["total_ms"] = _elapsed_ms(turn_start)
+
+        if self._recorder:
+            self._record_turn(
+                user_input,
+                relevant_memories,
+                searches,
+                processed_input_text,
                 assistant_response_text,
-                user_input.conversation_id,
-                user_input.device_id
+                timings,
+                arrived_at,
+                store_batched,
             )
-        
-        if self._debug_logging:
-             _LOGGER.debug(f"Output from EchoMind Agent: Response='{result.response.speech}', ConvID='{result.conversation_id}'")
+
+        if trace:
+            trace.event("output", speech=assistant_response_text, error_code=result.response.error_code)
 
         return result
 
+    def _record_turn(
+        self,
+        user_input: conversation.ConversationInput,
+        memories: list,
+        searches: List[Dict[str, Any]],
+        prompt_text: str,
+        response_text: str,
+        timings: Dict[str, float],
+        arrived_at: float,
+        store_batched: bool,
+    ) -> None:
+        """Write a trace of this turn (ids anonymized, query text verbatim) for later replay.
+
+        Every search the turn actually sent is recorded with its own payload,
+        so the replay repeats widened re-searches too.
+        """
+        recorded_searches = []
+        for search in searches:
+            payload = dict(search["payload"])
+            if "conversation_id" in payload:
+                payload["conversation_id"] = self._recorder.anonymize(payload["conversation_id"])
+            recorded_searches.append({**search, "payload": payload})
+        self._recorder.record({
+            "ts": arrived_at,
+            "conversation_id": self._recorder.anonymize(user_input.conversation_id),
+            "device_id": self._recorder.anonymize(user_input.device_id),
+            "language": user_input.language,
+            "query": user_input.text,
+            "retrieval": {
+                "searches": recorded_searches,
+                "results": len(memories),
+                "result_bytes": len(json.dumps(memories, ensure_ascii=False)),
+            },
+            "prompt_chars": len(prompt_text),
+            "response_chars": len(response_text),
+            "stored": self._auto_store,
+            "store_batched": store_batched, # store_ms es solo la puesta en cola; la escritura va en un lote
+            "timings": timings,
+        })
+
     async def _call_echomind_api(
         self, 
         method: str, 
@@ -198,12 +311,27 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
         # Por ahora, duplicamos una versión simplificada o podríamos importarla si la estructura lo permite.
         # Esta versión es más simple y asume que la URL del addon está en self._addon_url
         
-        url = f"{self._addon_url}/api/{endpoint.lstrip('/')}"
+        # La ruta activa la mantiene actualizada la sonda periódica de __init__.py
+        entry_data = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {})
+        addon_url = entry_data.get(CONF_ECHOMIND_ADDON_URL, self._addon_url)
+        url = f"{addon_url}/api/{endpoint.lstrip('/')}"
         session = async_get_clientsession(self.hass)
-        
-        if self._debug_logging:
-            _LOGGER.debug(f"Agent calling EchoMind API: {method} {url} with data: {data}")
+        trace = current_trace()
+        if trace:
+            trace.event("api.request", method=method, url=url, data=data)
 
+        with trace.span("api.call", method=method, endpoint=endpoint):
+            return await self._async_request(session, method, url, data, trace)
+
+    async def _async_request(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        data: Optional[Dict[str, Any]],
+        trace: Any,
+    ) -> Dict[str, Any]:
+        """Send one request to the addon and normalise the response."""
         try:
             async with async_timeout.timeout(10): # Timeout para llamadas API
                 if method.upper() == "GET":
@@ -218,16 +346,16 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
                 if api_response.status == 200 or api_response.status == 201:
                     try:
                         result_json = await api_response.json()
-                        if self._debug_logging:
-                            _LOGGER.debug(f"API response from {url}: {result_json}")
+                        if trace:
+                            trace.event("api.response", status=api_response.status, body=result_json)
                         return result_json
                     except aiohttp.ContentTypeError:
-                        if self._debug_logging:
-                            _LOGGER.debug(f"API response from {url} was not JSON (status: {api_response.status}).")
+                        if trace:
+                            trace.event("api.response", status=api_response.status, body=None)
                         return {"status": "success", "message": "Operation successful, no JSON response."}
                 elif api_response.status == 204:
-                     if self._debug_logging:
-                        _LOGGER.debug(f"API response from {url}: Success (204 No Content)")
+                     if trace:
+                        trace.event("api.response", status=api_response.status, body=None)
                      return {"status": "success", "message": "Operation successful (204 No Content)."}
                 else:
                     error_text = await api_response.text()
@@ -242,8 +370,14 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
             _LOGGER.exception(f"Unexpected error calling EchoMind API {url}: {e}")
             return {"error": "unexpected_error", "details": str(e)}
 
-    async def _get_relevant_memories(self, query: str, conversation_id: Optional[str]) -> list:
-        """Fetch relevant memories from EchoMind addon."""
+    async def _get_relevant_memories(
+        self, query: str, conversation_id: Optional[str]
+    ) -> Tuple[list, List[Dict[str, Any]]]:
+        """Fetch relevant memories from EchoMind addon.
+
+        Also returns the searches actually sent this turn (payload, result
+        count and latency).
+        """
         payload = {"query": query, "limit": self._memory_context_limit}
         if conversation_id:
             # Si tu API soporta filtrar por conversation_id, añádelo aquí
@@ -251,20 +385,73 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
             # O podrías pasar el conversation_id como un campo de primer nivel si la API lo espera así
             payload["conversation_id"] = conversation_id 
 
-        if self._debug_logging:
-            _LOGGER.debug(f"Searching memories with payload: {payload}")
-
-        response_data = await self._call_echomind_api("POST", "search", payload) # Asumiendo POST para búsqueda
+        searches: List[Dict[str, Any]] = []
+        if self._adaptive_context:
+            # Modo adaptativo: empezar con pocos candidatos puntuados y ampliar solo si siguen siendo relevantes
+            payload["include_scores"] = True
+            payload["limit"] = min(ADAPTIVE_INITIAL_LIMIT, self._memory_context_limit)
+            candidates = await self._search_memories(payload, searches)
+            if candidates is None:
+                return [], searches
+            if not has_scores(candidates):
+                # Sin puntuaciones no hay base para recortar: volver al límite configurado
+                memories = candidates
+                if len(candidates) >= payload["limit"] and payload["limit"] < self._memory_context_limit:
+                    payload = {**payload, "limit": self._memory_context_limit}
+                    widened = await self._search_memories(payload, searches)
+                    if widened is not None:
+                        memories = widened
+                if self._adaptive_stats:
+                    self._adaptive_stats.record_unscored()
+            else:
+                memories = select_relevant(candidates, self._relevance_threshold)
+                while should_widen(candidates, memories, payload["limit"], self._memory_context_limit):
+                    narrow = searches[-1]
+                    payload = {**payload, "limit": min(payload["limit"] * 2, self._memory_context_limit)}
+                    candidates = await self._search_memories(payload, searches)
+                    if candidates is None:
+                        break # Quedarse con lo ya seleccionado
+                    memories = select_relevant(candidates, self._relevance_threshold)
+                    if self._adaptive_stats:
+                        self._adaptive_stats.record_widening(
+                            narrow["payload"]["limit"], narrow["latency_ms"], payload["limit"], searches[-1]["latency_ms"]
+                        )
+        else:
+            memories = await self._search_memories(payload, searches)
+            if memories is None:
+                return [], searches
+
+        if self._adaptive_stats:
+            self._adaptive_stats.record_turn(payload["limit"], len(memories))
+        access = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("access")
+        if access:
+            access.record_hits(memories)
+        current_trace().set(memories_found=len(memories))
+        return memories, searches
+
+    async def _search_memories(self, payload: Dict[str, Any], searches: List[Dict[str, Any]]) -> Optional[list]:
+        """Run one memory search and log it in ``searches``; returns None if the addon call failed."""
+        start = time.monotonic()
+        # Marcar la búsqueda como prioritaria para que los trabajos en segundo plano esperen
+        jobs = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("jobs")
+        if jobs:
+            async with jobs.foreground():
+                response_data = await self._call_echomind_api("POST", "search", payload) # Asumiendo POST para búsqueda
+        else:
+            response_data = await self._call_echomind_api("POST", "search", payload)
+        latency_ms = _elapsed_ms(start)
         
         if "error" in response_data:
             _LOGGER.warning(f"Failed to get relevant memories: {response_data.get('details')}")
-            return []
+            searches.append({"payload": dict(payload), "results": None, "latency_ms": latency_ms})
+            return None
+        if self._adaptive_stats:
+            self._adaptive_stats.record_search(latency_ms)
         
         # Asumir que la respuesta es una lista de memorias si no hay error
         # o que está bajo una clave como "results" o "memories"
         memories = response_data if isinstance(response_data, list) else response_data.get("results", [])
-        if self._debug_logging:
-            _LOGGER.debug(f"Found {len(memories)} relevant memories.")
+        searches.append({"payload": dict(payload), "results": len(memories), "latency_ms": latency_ms})
         return memories
 
     def _enhance_text_with_memory(self, text: str, memories: list) -> str:
@@ -312,8 +499,6 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
     ) -> None:
         """Store the current user-assistant interaction in EchoMind."""
         if not user_text and not assistant_response: # No almacenar si no hay nada que almacenar
-            if self._debug_logging:
-                _LOGGER.debug("Skipping storage of empty interaction.")
             return
 
         payload = {
@@ -327,13 +512,24 @@ class EchoMindConversationAgent(conversation.AbstractConversationAgent):
                 "assistant_output": assistant_response # Guardar assistant_output por separado
             }
         }
-        if self._debug_logging:
-            _LOGGER.debug(f"Storing interaction with payload: {payload}")
+        # Group commit: encolar la escritura para que el addon indexe varias memorias juntas
+        batcher = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("batcher")
+        if batcher:
+            batcher.add(payload)
+            return
 
         response_data = await self._call_echomind_api("POST", "memories", payload)
         
         if "error" in response_data:
             _LOGGER.warning(f"Failed to store interaction: {response_data.get('details')}")
-        elif self._debug_logging:
+        else:
             memory_id = response_data.get("id", "unknown")
-            _LOGGER.debug(f"Interaction stored successfully. Memory ID: {memory_id}")
+            access = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("access")
+            if access:
+                access.record_added(memory_id)
+            current_trace().set(stored_memory_id=memory_id)
+
+
+def _elapsed_ms(start: float) -> float:
+    """Milliseconds elapsed since a time.monotonic() mark."""
+    return round((time.monotonic() - start) * 1000, 1)
@@ -0,0 +1,55 @@
+"""Diagnostics support for EchoMind Assist."""
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    CONF_ECHOMIND_ADDON_URL,
+    CONF_ACTIVE_ADDON_URL,
+    ATTR_TEXT,
+    ATTR_USER_ID,
+    ATTR_PATH,
+)
+
+# Lo que dice el usuario, prompts, cuerpos de peticiones/respuestas e identificadores:
+# los diagnósticos se adjuntan a menudo a issues públicos
+TO_REDACT = {
+    CONF_ECHOMIND_ADDON_URL,
+    CONF_ACTIVE_ADDON_URL,
+    ATTR_TEXT,
+    ATTR_USER_ID,
+    ATTR_PATH,
+    "url",
+    "speech",
+    "data",
+    "body",
+    "conversation_id",
+    "device_id",
+}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> Dict[str, Any]:
+    """Return diagnostics for a config entry, including the buffered traces."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    diagnostics: Dict[str, Any] = {
+        "config": dict(entry.data),
+        "options": dict(entry.options),
+    }
+    if entry_data is None:
+        return async_redact_data(diagnostics, TO_REDACT)
+
+    # Solo estado local: la descarga funciona aunque el addon no responda
+    diagnostics.update({
+        "active_addon_url": entry_data[CONF_ECHOMIND_ADDON_URL],
+        "routes": entry_data["routes"],
+        "jobs": entry_data["jobs"].list(),
+        "eviction": entry_data["access"].stats(),
+        "write_batching": entry_data["batcher"].stats(),
+        "memory_context": entry_data["adaptive"].stats(),
+        "trace_sample_rate": entry_data["tracer"].sample_rate,
+        "traces": entry_data["tracer"].traces(),
+    })
+    return async_redact_data(diagnostics, TO_REDACT)
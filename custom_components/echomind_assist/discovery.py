@@ -0,0 +1,160 @@
+"""Endpoint discovery for the EchoMind addon.
+
+Probes every candidate route to the addon concurrently, measures the
+round-trip latency of ``/api/health`` and picks the fastest healthy one.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    ADDON_SLUG,
+    ADDON_API_PORT,
+    SUPERVISOR_DNS_ADDON_URL,
+    LOCALHOST_ADDON_URL,
+    ROUTE_PROBE_TIMEOUT,
+    ROUTE_SWITCH_MIN_GAIN_MS,
+    ROUTE_SWITCH_MAX_RATIO,
+    ADDON_STATUS_WARMING_UP,
+)
+from .retention import ApiCaller
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def _async_get_supervisor_addon_url(hass: HomeAssistant) -> Optional[str]:
+    """Return the addon URL built from the internal hostname reported by the Supervisor."""
+    supervisor = os.environ.get("SUPERVISOR")
+    token = os.environ.get("SUPERVISOR_TOKEN")
+    if not supervisor or not token:
+        # No estamos en una instalación supervisada
+        return None
+
+    session = async_get_clientsession(hass)
+    headers = {"Authorization": f"Bearer {token}"}
+    timeout = aiohttp.ClientTimeout(total=ROUTE_PROBE_TIMEOUT)
+    try:
+        async with session.get(f"http://{supervisor}/addons", headers=headers, timeout=timeout) as response:
+            if response.status != 200:
+                return None
+            addons = (await response.json()).get("data", {}).get("addons", [])
+
+        # Los addons de repositorios externos llevan un prefijo (p.ej. "a1b2c3d4_echomind")
+        slug = next(
+            (
+                addon["slug"] for addon in addons
+                if addon.get("slug") == ADDON_SLUG or addon.get("slug", "").endswith(f"_{ADDON_SLUG}")
+            ),
+            None,
+        )
+        if not slug:
+            return None
+
+        async with session.get(f"http://{supervisor}/addons/{slug}/info", headers=headers, timeout=timeout) as response:
+            if response.status != 200:
+                return None
+            hostname = (await response.json()).get("data", {}).get("hostname")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+        _LOGGER.debug(f"Could not query the Supervisor API for the EchoMind addon hostname: {err}")
+        return None
+
+    return f"http://{hostname}:{ADDON_API_PORT}" if hostname else None
+
+
+async def async_get_candidate_urls(hass: HomeAssistant, configured_url: Optional[str] = None) -> List[str]:
+    """Return the de-duplicated list of candidate addon URLs, configured URL first."""
+    candidates = [configured_url, SUPERVISOR_DNS_ADDON_URL]
+    candidates.append(await _async_get_supervisor_addon_url(hass))
+    candidates.append(LOCALHOST_ADDON_URL)
+
+    urls: List[str] = []
+    for url in candidates:
+        if url and url.rstrip('/') not in urls:
+            urls.append(url.rstrip('/'))
+    return urls
+
+
+async def async_probe_route(hass: HomeAssistant, url: str) -> Dict[str, Any]:
+    """Probe a single route and return its health, warm-up state and round-trip latency."""
+    session = async_get_clientsession(hass)
+    result: Dict[str, Any] = {
+        "url": url, "healthy": False, "latency_ms": None, "status": None, "warming_up": False, "warmup": None
+    }
+    start = time.monotonic()
+    try:
+        async with session.get(
+            f"{url}/api/health", timeout=aiohttp.ClientTimeout(total=ROUTE_PROBE_TIMEOUT)
+        ) as response:
+            result["status"] = response.status
+            result["latency_ms"] = round((time.monotonic() - start) * 1000, 1)
+            result["healthy"] = response.status == 200
+            if result["healthy"]:
+                # El addon puede informar del progreso de calentamiento de sus índices
+                try:
+                    health = await response.json()
+                except (aiohttp.ContentTypeError, ValueError):
+                    health = None
+                if isinstance(health, dict) and health.get("status") == ADDON_STATUS_WARMING_UP:
+                    result["warming_up"] = True
+                    result["warmup"] = health.get("warmup")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        result["error"] = str(err) or type(err).__name__
+    return result
+
+
+async def async_discover_routes(hass: HomeAssistant, configured_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Probe all candidate routes concurrently, ready ones first sorted by latency."""
+    urls = await async_get_candidate_urls(hass, configured_url)
+    results = await asyncio.gather(*(async_probe_route(hass, url) for url in urls))
+    results = sorted(
+        results,
+        key=lambda r: (not r["healthy"], r["warming_up"], r["latency_ms"] if r["latency_ms"] is not None else float("inf")),
+    )
+    _LOGGER.debug(f"EchoMind route discovery results: {results}")
+    return results
+
+
+def fastest_healthy_route(results: List[Dict[str, Any]]) -> Optional[str]:
+    """Return the URL of the fastest healthy route, if any (warmed-up routes first)."""
+    for result in results:
+        if result["healthy"]:
+            return result["url"]
+    return None
+
+
+def preferred_route(results: List[Dict[str, Any]], current_url: Optional[str]) -> Optional[str]:
+    """Return the route to use, keeping the current one unless another is clearly better.
+
+    Routes with nearly the same latency (e.g. localhost vs. Supervisor DNS)
+    would otherwise flip on every probe, rewriting the config entry each time.
+    """
+    fastest = fastest_healthy_route(results)
+    current = next((r for r in results if r["url"] == current_url), None)
+    if not fastest or fastest == current_url or current is None or not current["healthy"]:
+        return fastest
+
+    best = next(r for r in results if r["url"] == fastest)
+    if current["warming_up"] and not best["warming_up"]:
+        return fastest
+    gain = current["latency_ms"] - best["latency_ms"]
+    if gain >= ROUTE_SWITCH_MIN_GAIN_MS and best["latency_ms"] <= current["latency_ms"] * ROUTE_SWITCH_MAX_RATIO:
+        return fastest
+    return current_url
+
+
+async def async_addon_supports(api_call: ApiCaller, *capabilities_needed: str) -> bool:
+    """Return True only if the addon explicitly advertises every capability in ``/api/health``."""
+    try:
+        health = await api_call("GET", "health", None)
+    except HomeAssistantError:
+        return False
+    capabilities = health.get("capabilities") if isinstance(health, dict) else None
+    return isinstance(capabilities, list) and all(capability in capabilities for capability in capabilities_needed)
@@ -0,0 +1,11 @@
+"""Errors raised by the EchoMind Assist API helpers."""
+from homeassistant.exceptions import HomeAssistantError
+
+
+class EchoMindApiError(HomeAssistantError):
+    """The addon answered with an HTTP error status."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """Initialize the error with the HTTP status of the response."""
+        super().__init__(message)
+        self.status = status
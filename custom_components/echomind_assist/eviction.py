@@ -0,0 +1,217 @@
+"""Access-aware eviction for the EchoMind ``max_memories`` cap.
+
+Keeps cheap per-memory access statistics (hit count and last hit time),
+updated on every search hit, and uses them to pick which memories to evict
+once the store grows past the cap.
+
+Eviction is opt-in and only runs when the addon advertises delete-by-id and
+id listing support. Each pass re-lists the ids in the store first: ids that
+no longer exist (e.g. removed by ``clear_memory``) are forgotten, and memories
+the integration has never seen are tracked with zero hits, so they rank as
+the coldest instead of being skipped.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    EVICTION_POLICY_LFU,
+    EVICTION_POLICY_LRU,
+    EVICTION_AGE_HALF_LIFE_DAYS,
+    EVICTION_LOW_WATERMARK,
+    ACCESS_STORAGE_VERSION,
+    ACCESS_SAVE_DELAY,
+    DEFAULT_CLEANUP_CHUNK_SIZE,
+    DEFAULT_CLEANUP_CHUNK_INTERVAL,
+    ADDON_CAPABILITY_DELETE_BY_ID,
+    ADDON_CAPABILITY_LIST_IDS,
+)
+from .discovery import async_addon_supports
+from .jobs import BackgroundJobManager, JobRunner
+from .retention import ApiCaller
+
+_LOGGER = logging.getLogger(__name__)
+
+# Cuántos ids de memorias desalojadas se guardan en las estadísticas
+EVICTED_IDS_SAMPLE = 20
+
+
+class MemoryAccessTracker:
+    """Track access counts and last-hit times of EchoMind memories."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the tracker."""
+        self._store = Store(hass, ACCESS_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.access")
+        self._memories: Dict[str, Dict[str, Any]] = {}
+        self._eviction: Dict[str, Any] = {"total_evicted": 0, "last_run": None}
+
+    async def async_load(self) -> None:
+        """Load persisted access statistics."""
+        data = await self._store.async_load() or {}
+        self._memories = data.get("memories", {})
+        self._eviction.update(data.get("eviction", {}))
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        """Return the data to persist."""
+        return {"memories": self._memories, "eviction": self._eviction}
+
+    def _schedule_save(self) -> None:
+        """Persist lazily; many hits collapse into one write."""
+        self._store.async_delay_save(self._data_to_save, ACCESS_SAVE_DELAY)
+
+    def record_added(self, memory_id: Optional[str]) -> None:
+        """Start tracking a newly stored memory."""
+        if not memory_id or memory_id == "unknown":
+            return
+        self._memories.setdefault(memory_id, {"hits": 0, "last_hit": None, "added": time.time()})
+        self._schedule_save()
+
+    def record_hits(self, memories: Iterable[Any]) -> None:
+        """Record a search hit for every memory in a result list."""
+        now = time.time()
+        recorded = False
+        for mem in memories:
+            memory_id = mem.get("id") if isinstance(mem, dict) else None
+            if not memory_id:
+                continue
+            entry = self._memories.setdefault(memory_id, {"hits": 0, "last_hit": None, "added": now})
+            entry["hits"] += 1
+            entry["last_hit"] = now
+            recorded = True
+        if recorded:
+            self._schedule_save()
+
+    def _score(self, entry: Dict[str, Any], policy: str, now: float) -> float:
+        """Return the retention score of a memory; lowest scores are evicted first."""
+        last_seen = entry["last_hit"] or entry["added"]
+        if policy == EVICTION_POLICY_LRU:
+            return last_seen
+        if policy == EVICTION_POLICY_LFU:
+            # Desempatar por antigüedad del último acceso
+            return entry["hits"] + last_seen / now
+        # age_weighted: los aciertos pierden la mitad de su peso cada EVICTION_AGE_HALF_LIFE_DAYS
+        idle_days = max(now - last_seen, 0) / 86400
+        return (entry["hits"] + 1) * 0.5 ** (idle_days / EVICTION_AGE_HALF_LIFE_DAYS)
+
+    def sync(self, memories: Dict[str, float]) -> int:
+        """Match the tracked set to the ids in the store (id -> creation time).
+
+        Returns how many stale ids were forgotten.
+        """
+        stale = [memory_id for memory_id in self._memories if memory_id not in memories]
+        for memory_id in stale:
+            del self._memories[memory_id]
+        for memory_id, added in memories.items():
+            # Nunca vista por la integración: cero aciertos desde su creación
+            self._memories.setdefault(memory_id, {"hits": 0, "last_hit": None, "added": added})
+        self._schedule_save()
+        return len(stale)
+
+    def select_victims(self, count: int, policy: str) -> List[str]:
+        """Return up to ``count`` memory ids to evict under ``policy``."""
+        if count <= 0:
+            return []
+        now = time.time()
+        ranked = sorted(self._memories, key=lambda memory_id: self._score(self._memories[memory_id], policy, now))
+        return ranked[:count]
+
+    def record_evicted(self, memory_ids: List[str]) -> None:
+        """Forget memories that have been evicted."""
+        for memory_id in memory_ids:
+            self._memories.pop(memory_id, None)
+        self._eviction["total_evicted"] += len(memory_ids)
+        self._schedule_save()
+
+    def record_eviction_run(self, memory_ids: List[str], policy: str) -> None:
+        """Record the outcome of an eviction pass for the stats."""
+        self._eviction["last_run"] = time.time()
+        self._eviction["last_policy"] = policy
+        self._eviction["last_evicted"] = len(memory_ids)
+        self._eviction["last_evicted_ids"] = memory_ids[-EVICTED_IDS_SAMPLE:]
+        self._schedule_save()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return access and eviction statistics."""
+        return {"tracked_memories": len(self._memories), **self._eviction}
+
+    async def async_save(self) -> None:
+        """Persist access statistics immediately."""
+        await self._store.async_save(self._data_to_save())
+
+
+def eviction_runner(
+    api_call: ApiCaller,
+    tracker: MemoryAccessTracker,
+    max_memories: int,
+    policy: str,
+    chunk_size: int = DEFAULT_CLEANUP_CHUNK_SIZE,
+    chunk_interval: float = DEFAULT_CLEANUP_CHUNK_INTERVAL,
+) -> JobRunner:
+    """Build a job that evicts the least valuable memories once the cap is exceeded.
+
+    Evicts down to ``EVICTION_LOW_WATERMARK`` of the cap so the pass does not
+    have to run again after every new memory.
+    """
+
+    async def _run(manager: BackgroundJobManager, job_id: str) -> Dict[str, Any]:
+        # Un addon que ignore memory_ids interpretaría el DELETE sin filtros como "borrar todo", y sin la
+        # lista de ids se desalojaría desde una vista parcial (las memorias usadas antes que las no vistas)
+        if not await async_addon_supports(api_call, ADDON_CAPABILITY_DELETE_BY_ID, ADDON_CAPABILITY_LIST_IDS):
+            _LOGGER.warning(
+                "EchoMind eviction skipped: the addon does not advertise "
+                f"'{ADDON_CAPABILITY_DELETE_BY_ID}' and '{ADDON_CAPABILITY_LIST_IDS}' in /api/health capabilities"
+            )
+            return {"evicted": 0, "skipped": "addon_unsupported"}
+
+        listing = await api_call("GET", "memories/ids", None)
+        memories = _parse_id_listing(listing)
+        forgotten = tracker.sync(memories)
+        total = len(memories)
+        if total <= max_memories:
+            return {"evicted": 0, "total_memories": total, "forgotten": forgotten}
+
+        victims = tracker.select_victims(total - int(max_memories * EVICTION_LOW_WATERMARK), policy)
+        manager.update_progress(job_id, total_memories=total, candidates=len(victims), evicted=0)
+
+        evicted: List[str] = []
+        for start in range(0, len(victims), chunk_size):
+            await manager.async_yield_to_foreground()
+            batch = victims[start:start + chunk_size]
+            result = await api_call("DELETE", "memories", {"memory_ids": batch})
+            # Solo cuenta como desalojado lo que el addon confirma haber borrado
+            requested = set(batch)
+            deleted = [memory_id for memory_id in result.get("deleted_ids") or [] if memory_id in requested]
+            tracker.record_evicted(deleted)
+            evicted.extend(deleted)
+            manager.update_progress(job_id, evicted=len(evicted))
+            if len(deleted) < len(batch):
+                _LOGGER.warning(
+                    f"EchoMind addon confirmed {len(deleted)} of {len(batch)} evictions; stopping this pass"
+                )
+                break
+            if start + chunk_size < len(victims):
+                await asyncio.sleep(chunk_interval)
+
+        tracker.record_eviction_run(evicted, policy)
+        _LOGGER.info(f"EchoMind eviction ({policy}) removed {len(evicted)} memories (store had {total}, cap {max_memories})")
+        return {"evicted": len(evicted), "total_memories": total, "forgotten": forgotten, "policy": policy}
+
+    return _run
+
+
+def _parse_id_listing(listing: Dict[str, Any]) -> Dict[str, float]:
+    """Return id -> creation time (epoch seconds) from a ``memories/ids`` response."""
+    now = time.time()
+    memories: Dict[str, float] = {}
+    for memory in listing.get("memories") or []:
+        if not isinstance(memory, dict) or not memory.get("id"):
+            continue
+        created = dt_util.parse_datetime(memory["created_at"]) if isinstance(memory.get("created_at"), str) else None
+        memories[memory["id"]] = created.timestamp() if created else now
+    return memories
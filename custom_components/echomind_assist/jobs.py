@@ -0,0 +1,147 @@
+"""Background job manager for long-running EchoMind operations.
+
+Jobs run as Home Assistant background tasks, report progress through events
+and can be queried by id. They yield to foreground work (memory searches of
+the conversation agent and services) so bulk maintenance never stalls a turn.
+"""
+import asyncio
+import contextlib
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    EVENT_ECHOMIND_JOB_PROGRESS,
+    MAX_TRACKED_JOBS,
+    JOB_STATE_RUNNING,
+    JOB_STATE_COMPLETED,
+    JOB_STATE_FAILED,
+    JOB_STATE_CANCELLED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+JobRunner = Callable[["BackgroundJobManager", str], Awaitable[Dict[str, Any]]]
+
+
+class BackgroundJobManager:
+    """Run, track and report progress of background jobs for one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the job manager."""
+        self.hass = hass
+        self.entry_id = entry_id
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._foreground_active = 0
+        self._foreground_idle = asyncio.Event()
+        self._foreground_idle.set()
+
+    @contextlib.asynccontextmanager
+    async def foreground(self) -> AsyncIterator[None]:
+        """Mark a latency-sensitive operation (e.g. a search) as in flight."""
+        self._foreground_active += 1
+        self._foreground_idle.clear()
+        try:
+            yield
+        finally:
+            self._foreground_active -= 1
+            if self._foreground_active == 0:
+                self._foreground_idle.set()
+
+    async def async_yield_to_foreground(self) -> None:
+        """Wait until no foreground operation is in flight."""
+        await self._foreground_idle.wait()
+
+    def async_start(self, job_type: str, runner: JobRunner, params: Optional[Dict[str, Any]] = None) -> str:
+        """Start a job in the background and return its id immediately."""
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            "job_id": job_id,
+            "type": job_type,
+            "state": JOB_STATE_RUNNING,
+            "params": params or {},
+            "progress": {},
+            "started": dt_util.utcnow().isoformat(),
+            "finished": None,
+            "result": None,
+            "error": None,
+        }
+        self._prune()
+        self._tasks[job_id] = self.hass.async_create_background_task(
+            self._async_run(job_id, runner), name=f"{DOMAIN} {job_type} {job_id}"
+        )
+        _LOGGER.info(f"Started EchoMind {job_type} job {job_id} with params: {params}")
+        return job_id
+
+    async def _async_run(self, job_id: str, runner: JobRunner) -> None:
+        """Run a job, recording its outcome."""
+        job = self._jobs[job_id]
+        try:
+            job["result"] = await runner(self, job_id)
+            job["state"] = JOB_STATE_COMPLETED
+        except asyncio.CancelledError:
+            job["state"] = JOB_STATE_CANCELLED
+            raise
+        except Exception as e:
+            _LOGGER.error(f"EchoMind {job['type']} job {job_id} failed: {e}")
+            job["state"] = JOB_STATE_FAILED
+            job["error"] = str(e)
+        finally:
+            job["finished"] = dt_util.utcnow().isoformat()
+            self._tasks.pop(job_id, None)
+            self._fire(job)
+
+    def update_progress(self, job_id: str, **progress: Any) -> None:
+        """Record progress for a job and fire a progress event."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job["progress"].update(progress)
+        self._fire(job)
+
+    def _fire(self, job: Dict[str, Any]) -> None:
+        """Fire the progress event for a job."""
+        self.hass.bus.async_fire(
+            EVENT_ECHOMIND_JOB_PROGRESS,
+            {
+                "job_id": job["job_id"],
+                "type": job["type"],
+                "state": job["state"],
+                "progress": dict(job["progress"]),
+            },
+        )
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond MAX_TRACKED_JOBS."""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= MAX_TRACKED_JOBS:
+                break
+            if self._jobs[job_id]["state"] != JOB_STATE_RUNNING:
+                del self._jobs[job_id]
+
+    def is_running(self, job_type: str) -> bool:
+        """Return True if a job of the given type is running."""
+        return any(
+            job["type"] == job_type and job["state"] == JOB_STATE_RUNNING for job in self._jobs.values()
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the status of a job."""
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return the status of all tracked jobs, newest first."""
+        return list(reversed(self._jobs.values()))
+
+    async def async_shutdown(self) -> None:
+        """Cancel all running jobs."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,72 @@
+"""Opt-in recorder of conversation turn traces.
+
+Each turn is appended as one NDJSON line to a size-rotated local file, so the
+real query mix and burst patterns of a household can be replayed later with
+``tools/replay_traces.py``. Conversation and device ids are hashed, but the
+query text is kept verbatim because the replay re-sends it as the search.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    TRACE_DIR,
+    TRACE_FILE_NAME,
+    TRACE_FILE_MAX_BYTES,
+    TRACE_FILE_BACKUP_COUNT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def anonymize_id(value: Optional[str], salt: str) -> Optional[str]:
+    """Return a stable, non-reversible token for an identifier."""
+    if not value:
+        return None
+    return hashlib.sha256(f"{salt}:{value}".encode()).hexdigest()[:12]
+
+
+class TraceRecorder:
+    """Append turn traces to a rotating NDJSON file."""
+
+    def __init__(self, hass: HomeAssistant, salt: str) -> None:
+        """Initialize the recorder."""
+        self.hass = hass
+        self._salt = salt
+        self._path = hass.config.path(TRACE_DIR, TRACE_FILE_NAME)
+        self._lock = threading.Lock() # Las escrituras corren en hilos del executor
+
+    def anonymize(self, value: Optional[str]) -> Optional[str]:
+        """Anonymize an identifier (conversation id, device id)."""
+        return anonymize_id(value, self._salt)
+
+    def record(self, trace: Dict[str, Any]) -> None:
+        """Queue a trace to be written in the executor."""
+        line = json.dumps(trace, ensure_ascii=False)
+        self.hass.async_add_executor_job(self._write, line)
+
+    def _write(self, line: str) -> None:
+        """Append one line, rotating the file when it grows too large."""
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self._path), exist_ok=True)
+                if os.path.exists(self._path) and os.path.getsize(self._path) >= TRACE_FILE_MAX_BYTES:
+                    self._rotate()
+                with open(self._path, "a", encoding="utf-8") as file:
+                    file.write(line)
+                    file.write("\n")
+        except OSError as e:
+            _LOGGER.warning(f"Could not write EchoMind trace to {self._path}: {e}")
+
+    def _rotate(self) -> None:
+        """Shift traces.ndjson -> traces.ndjson.1 -> ... dropping the oldest."""
+        for index in range(TRACE_FILE_BACKUP_COUNT - 1, 0, -1):
+            source = f"{self._path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self._path}.{index + 1}")
+        os.replace(self._path, f"{self._path}.1")
@@ -0,0 +1,61 @@
+"""Incremental, rate-limited retention cleanup for EchoMind."""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .const import (
+    DEFAULT_CLEANUP_CHUNK_SIZE,
+    DEFAULT_CLEANUP_CHUNK_INTERVAL,
+)
+from .jobs import BackgroundJobManager, JobRunner
+
+_LOGGER = logging.getLogger(__name__)
+
+ApiCaller = Callable[[str, str, Optional[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+
+def retention_cleanup_runner(
+    api_call: ApiCaller,
+    filters: Dict[str, Any],
+    chunk_size: int = DEFAULT_CLEANUP_CHUNK_SIZE,
+    chunk_interval: float = DEFAULT_CLEANUP_CHUNK_INTERVAL,
+) -> JobRunner:
+    """Build a job that deletes matching memories in bounded chunks.
+
+    Each chunk is a ``DELETE /api/memories`` with the filters plus ``limit``.
+    The addon reports how many memories it ``deleted``; a short count means
+    nothing is left to delete. An addon that ignores ``limit`` and reports no
+    count has done a single bulk delete, which the result flags as
+    ``chunked: False``.
+    """
+
+    async def _run(manager: BackgroundJobManager, job_id: str) -> Dict[str, Any]:
+        deleted_total = 0
+        chunks = 0
+        chunked = True
+        while True:
+            # Ceder el paso a las búsquedas en curso antes de cada bloque
+            await manager.async_yield_to_foreground()
+
+            result = await api_call("DELETE", "memories", {**filters, "limit": chunk_size})
+            deleted = result.get("deleted")
+            chunks += 1
+            deleted_total += deleted or 0
+            manager.update_progress(job_id, chunks=chunks, deleted=deleted_total)
+            _LOGGER.debug(f"Retention job {job_id}: chunk {chunks} deleted {deleted} memories")
+
+            if not isinstance(deleted, int):
+                chunked = False
+                break
+            if deleted < chunk_size:
+                break
+            # Limitar la tasa de borrado para no saturar el addon
+            await asyncio.sleep(chunk_interval)
+
+        if chunked:
+            _LOGGER.info(f"Retention job {job_id} finished: {deleted_total} memories deleted in {chunks} chunks")
+        else:
+            _LOGGER.info(f"Retention job {job_id} finished as a single bulk delete (addon does not support chunked deletes)")
+        return {"deleted": deleted_total, "chunks": chunks, "chunked": chunked}
+
+    return _run
@@ -0,0 +1,171 @@
+"""Sampled, low-overhead tracing for the EchoMind Assist hot path.
+
+A trace covers one conversation turn (or service call) and holds timed spans
+and events. Only a configurable fraction of turns is sampled; unsampled turns
+get a shared no-op trace, so payloads are never formatted or copied for them.
+Finished traces are kept in an in-memory ring buffer for the ``get_traces``
+service and the diagnostics download.
+"""
+import contextlib
+import contextvars
+import random
+import secrets
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from homeassistant.util import dt as dt_util
+
+_CURRENT_TRACE: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar(
+    "echomind_current_trace", default=None
+)
+
+
+class _NoopTrace:
+    """Trace handed out for unsampled turns; every operation is free."""
+
+    trace_id = None
+
+    def __bool__(self) -> bool:
+        return False
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        yield
+
+    def event(self, name: str, **attributes: Any) -> None:
+        return None
+
+    def set(self, **attributes: Any) -> None:
+        return None
+
+    def finish(self, status: str = "ok") -> None:
+        return None
+
+
+NOOP_TRACE = _NoopTrace()
+
+
+class Trace:
+    """A sampled trace made of spans and events."""
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]) -> None:
+        """Start the trace."""
+        self._tracer = tracer
+        self._start = time.monotonic()
+        self._token: Optional[contextvars.Token] = _CURRENT_TRACE.set(self)
+        self._span_stack: List[str] = []
+        self._finished = False
+        self.trace_id = secrets.token_hex(8)
+        self.data: Dict[str, Any] = {
+            "trace_id": self.trace_id,
+            "name": name,
+            "started": dt_util.utcnow().isoformat(),
+            "attributes": attributes,
+            "spans": [],
+            "events": [],
+        }
+
+    def __bool__(self) -> bool:
+        return True
+
+    def _offset_ms(self) -> float:
+        """Milliseconds since the trace started."""
+        return round((time.monotonic() - self._start) * 1000, 1)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        """Time a block of work as a child span of the current span."""
+        if self._finished:
+            # Tareas lanzadas durante el turno heredan el contexto; no tocar trazas ya cerradas
+            yield
+            return
+        span: Dict[str, Any] = {
+            "span_id": secrets.token_hex(4),
+            "parent_id": self._span_stack[-1] if self._span_stack else None,
+            "name": name,
+            "start_ms": self._offset_ms(),
+            "attributes": attributes,
+        }
+        self._span_stack.append(span["span_id"])
+        try:
+            yield
+        except Exception as e:
+            span["error"] = str(e)
+            raise
+        finally:
+            self._span_stack.pop()
+            # Un span que termina después de finish() ya no pertenece a la traza publicada
+            if not self._finished:
+                span["duration_ms"] = round(self._offset_ms() - span["start_ms"], 1)
+                self.data["spans"].append(span)
+
+    def event(self, name: str, **attributes: Any) -> None:
+        """Record a point-in-time event (e.g. a request payload) in the current span."""
+        if self._finished:
+            return
+        self.data["events"].append({
+            "name": name,
+            "span_id": self._span_stack[-1] if self._span_stack else None,
+            "at_ms": self._offset_ms(),
+            **attributes,
+        })
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes to the trace."""
+        self.data["attributes"].update(attributes)
+
+    def finish(self, status: str = "ok") -> None:
+        """Close the trace and push it to the ring buffer."""
+        if self._finished:
+            return
+        self._finished = True
+        if self._token is not None:
+            _CURRENT_TRACE.reset(self._token)
+            self._token = None
+        self.data["status"] = status
+        self.data["duration_ms"] = self._offset_ms()
+        self._tracer.add(self.data)
+
+
+class Tracer:
+    """Create sampled traces and keep the last N finished ones."""
+
+    def __init__(self, sample_rate: float, buffer_size: int) -> None:
+        """Initialize the tracer."""
+        self.sample_rate = sample_rate
+        self._traces: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+
+    def start_trace(self, name: str, **attributes: Any) -> Any:
+        """Start a trace for a turn, or return the no-op trace if it is not sampled."""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return NOOP_TRACE
+        return Trace(self, name, attributes)
+
+    def add(self, trace: Dict[str, Any]) -> None:
+        """Store a finished trace."""
+        self._traces.append(trace)
+
+    def traces(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return finished traces, newest first."""
+        traces = list(reversed(self._traces))
+        return traces[:limit] if limit else traces
+
+
+def current_trace() -> Any:
+    """Return the trace of the running turn (the no-op trace if none is sampled)."""
+    return _CURRENT_TRACE.get() or NOOP_TRACE
+
+
+@contextlib.contextmanager
+def detach() -> Iterator[None]:
+    """Run a block outside the current trace.
+
+    Tasks and timers created during a turn copy its context; work that
+    outlives the turn (e.g. batched writes) must not add spans to it.
+    """
+    token = _CURRENT_TRACE.set(None)
+    try:
+        yield
+    finally:
+        _CURRENT_TRACE.reset(token)
@@ -5,6 +5,10 @@
 # Script de inicio para el Addon EchoMind
 # ==============================================================================
 
+# Marca de tiempo de arranque para medir el time-to-healthy (bash >= 5)
+START_TIME="${EPOCHREALTIME}"
+HEALTH_POLL_INTERVAL="0.5"
+
 # Configuración de Bash Strict Mode (opcional pero recomendado)
 set -o errexit  # Salir inmediatamente si un comando falla
 set -o nounset  # Salir si se usa una variable no definida
@@ -81,22 +85,50 @@ cd /app || bashio::exit.nok "No se pudo cambiar al directorio /app"
 
 # Iniciar la aplicación Node.js (EchoMind)
 bashio::log.info "Iniciando la aplicación EchoMind (Node.js)..."
-# Usar `exec` para reemplazar el proceso de shell con el proceso de Node
-# o ejecutar en segundo plano si necesitas que el script continúe (por ejemplo, para health checks)
-
-# Opción 1: Ejecutar en segundo plano y esperar (como en tu script original)
-# Esto permite que bashio maneje señales y que el script siga si Node.js no las maneja bien
-# npm start &
-# APP_PID=$!
-# bashio::log.info "Aplicación EchoMind iniciada con PID: ${APP_PID}"
-# wait "${APP_PID}"
-
-# Opción 2: Usar exec para reemplazar el proceso actual (más limpio si Node maneja señales SIGTERM/SIGINT)
-# Asegúrate de que tu app Node.js maneje correctamente SIGTERM para un apagado limpio.
-exec npm start
+# Se ejecuta en segundo plano para poder medir el tiempo hasta que /api/health responde
+# (time-to-healthy) y se reenvían las señales para un apagado limpio.
+npm start &
+APP_PID=$!
+bashio::log.info "Aplicación EchoMind iniciada con PID: ${APP_PID}"
+# Reenviar la señal a la app; wait (más abajo) vuelve a esperar a que termine de apagarse
+forward_signal() {
+    bashio::log.info "Señal recibida, deteniendo la aplicación EchoMind..."
+    kill -TERM "${APP_PID}" 2>/dev/null || true
+}
+trap forward_signal TERM INT
+
+# Medir el tiempo de arranque hasta que la API está sana (y ha terminado de calentar los índices)
+report_time_to_healthy() {
+    local elapsed health
+    while kill -0 "${APP_PID}" 2>/dev/null; do
+        if health=$(curl -fs "http://127.0.0.1:${ECHOMIND_API_PORT}/api/health") && \
+           [ "$(echo "${health}" | jq -r '.status? // empty' 2>/dev/null)" != "warming_up" ]; then
+            elapsed=$(awk -v start="${START_TIME}" -v now="${EPOCHREALTIME}" 'BEGIN { printf "%.2f", now - start }')
+            bashio::log.info "EchoMind sano en /api/health tras ${elapsed}s desde el arranque del addon"
+            echo "{\"time_to_healthy_seconds\": ${elapsed}}" > /data/config/startup_metrics.json
+            return 0
+        fi
+        sleep "${HEALTH_POLL_INTERVAL}"
+    done
+}
+report_time_to_healthy &
+HEALTH_PID=$!
+
+# Una señal interrumpe wait (código > 128) antes de que la app termine: volver a esperar
+# mientras siga viva. errexit se desactiva para que ese código no aborte el apagado.
+set +o errexit
+wait "${APP_PID}"
+APP_EXIT_CODE=$?
+while kill -0 "${APP_PID}" 2>/dev/null; do
+    wait "${APP_PID}"
+    APP_EXIT_CODE=$?
+done
+kill "${HEALTH_PID}" 2>/dev/null
+set -o errexit
 
 # Si npm start no funciona directamente, podría ser necesario llamar a node explícitamente:
-# exec node server.js # o el entrypoint de tu aplicación
+# node server.js & # o el entrypoint de tu aplicación
 
-bashio::log.info "Aplicación EchoMind detenida."
+bashio::log.info "Aplicación EchoMind detenida (código ${APP_EXIT_CODE})."
 # Código de salida (opcional, bashio::exit.ok o bashio::exit.nok)
+exit "${APP_EXIT_CODE}"
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Replay recorded EchoMind Assist turn traces against an addon endpoint.
+
+Traces are written by the integration when the ``record_traces`` option is
+enabled (``<config>/echomind_traces/traces.ndjson*``). The replay keeps the
+recorded arrival times (scaled by ``--speed``), so bursts and
+overlapping turns hit the addon with the same concurrency as in real use.
+Each turn repeats every search the integration sent (adaptive context can
+widen a search), one after another and with the recorded payloads.
+
+Writes are replayed (``--include-writes``) as one ``POST /api/memories`` per
+turn. The integration groups writes into batches, so the addon sees fewer,
+larger requests than the replay sends. For the same reason the recorded
+``store_ms`` of a batched turn (``store_batched``) only measures the enqueue,
+not the write.
+
+Examples:
+    python3 tools/replay_traces.py traces/ --target http://homeassistant.local:8765
+    python3 tools/replay_traces.py traces/ --speed 4 --stand-in
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+# Cabeceras con las que el cliente indica al stand-in lo que se grabó
+HEADER_RESULTS = "X-EchoMind-Replay-Results"
+HEADER_LATENCY = "X-EchoMind-Replay-Latency-Ms"
+
+
+def load_traces(source: str) -> List[Dict[str, Any]]:
+    """Load traces from a file or a directory of (rotated) trace files, oldest first."""
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, "traces.ndjson*"))
+    else:
+        paths = [source]
+
+    traces = []
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    traces.append(json.loads(line))
+    return sorted(traces, key=lambda trace: trace["ts"])
+
+
+async def start_stand_in(port: int) -> web.AppRunner:
+    """Start a local stand-in for the addon that mimics the recorded sizes and latencies."""
+
+    async def search(request: web.Request) -> web.Response:
+        await asyncio.sleep(float(request.headers.get(HEADER_LATENCY, 0)) / 1000)
+        count = int(request.headers.get(HEADER_RESULTS, 0))
+        return web.json_response([
+            {"id": f"stand-in-{index}", "text": "replayed memory", "score": 1.0 - index / 100}
+            for index in range(count)
+        ])
+
+    async def memories(request: web.Request) -> web.Response:
+        return web.json_response({"id": "stand-in"}, status=201)
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    app = web.Application()
+    app.router.add_post("/api/search", search)
+    app.router.add_post("/api/memories", memories)
+    app.router.add_get("/api/health", health)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def recorded_searches(trace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the searches of a turn; older traces recorded a single payload and the stage time."""
+    retrieval = trace.get("retrieval", {})
+    if "searches" in retrieval:
+        return retrieval["searches"]
+    return [{
+        "payload": retrieval.get("payload"),
+        "results": retrieval.get("results", 0),
+        "latency_ms": trace.get("timings", {}).get("retrieval_ms", 0),
+    }]
+
+
+async def replay_turn(
+    session: aiohttp.ClientSession,
+    target: str,
+    trace: Dict[str, Any],
+    include_writes: bool,
+    semaphore: Optional[asyncio.Semaphore],
+    results: List[Dict[str, Any]],
+) -> None:
+    """Replay the retrieval (and optionally the write) of one recorded turn."""
+    outcome: Dict[str, Any] = {"ok": True, "search_ms": None, "write_ms": None}
+    async with semaphore if semaphore else contextlib.nullcontext():
+        start = time.monotonic()
+        try:
+            # Las búsquedas de un turno son secuenciales (la ampliación depende de la anterior)
+            for search in recorded_searches(trace):
+                headers = {
+                    HEADER_RESULTS: str(search.get("results") or 0),
+                    HEADER_LATENCY: str(search.get("latency_ms", 0)),
+                }
+                async with session.post(f"{target}/api/search", json=search.get("payload"), headers=headers) as response:
+                    await response.read()
+                    outcome["ok"] = outcome["ok"] and response.status == 200
+            outcome["search_ms"] = (time.monotonic() - start) * 1000
+
+            if include_writes and trace.get("stored"):
+                # Solo se graba el tamaño de la respuesta; se envía un texto sintético de esa longitud.
+                # Una petición por turno: no reproduce los lotes que forma la integración
+                text = "x" * (len(trace.get("query", "")) + trace.get("response_chars", 0))
+                start = time.monotonic()
+                async with session.post(
+                    f"{target}/api/memories", json={"text": text, "context": {"source": "echomind_replay"}}
+                ) as response:
+                    await response.read()
+                    outcome["ok"] = outcome["ok"] and response.status in (200, 201, 204)
+                outcome["write_ms"] = (time.monotonic() - start) * 1000
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            outcome["ok"] = False
+            outcome["error"] = str(err) or type(err).__name__
+    results.append(outcome)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def report(results: List[Dict[str, Any]], wall_seconds: float, max_lag_ms: float) -> None:
+    """Print a latency summary of the replay."""
+    searches = [r["search_ms"] for r in results if r["search_ms"] is not None]
+    writes = [r["write_ms"] for r in results if r["write_ms"] is not None]
+    errors = sum(1 for r in results if not r["ok"])
+    print(f"turns replayed: {len(results)} in {wall_seconds:.1f}s, errors: {errors}, max schedule lag: {max_lag_ms:.1f} ms")
+    for name, values in (("search", searches), ("write", writes)):
+        if values:
+            print(
+                f"{name:>6}: p50 {percentile(values, 50):.1f} ms  p95 {percentile(values, 95):.1f} ms  "
+                f"p99 {percentile(values, 99):.1f} ms  mean {statistics.mean(values):.1f} ms"
+            )
+
+
+async def replay(args: argparse.Namespace) -> int:
+    """Replay all traces, preserving their recorded timing."""
+    traces = load_traces(args.traces)
+    if not traces:
+        print(f"No traces found in {args.traces}", file=sys.stderr)
+        return 1
+
+    stand_in = None
+    target = args.target.rstrip("/")
+    if args.stand_in:
+        stand_in = await start_stand_in(args.stand_in_port)
+        target = f"http://127.0.0.1:{args.stand_in_port}"
+
+    semaphore = asyncio.Semaphore(args.max_concurrency) if args.max_concurrency else None
+    results: List[Dict[str, Any]] = []
+    tasks = []
+    max_lag_ms = 0.0
+    first_ts = traces[0]["ts"]
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            start = time.monotonic()
+            for trace in traces:
+                # Respetar los tiempos entre llegadas grabados, escalados por --speed
+                due = (trace["ts"] - first_ts) / args.speed
+                delay = due - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                max_lag_ms = max(max_lag_ms, -delay * 1000)
+                tasks.append(asyncio.create_task(
+                    replay_turn(session, target, trace, args.include_writes, semaphore, results)
+                ))
+            await asyncio.gather(*tasks)
+            wall_seconds = time.monotonic() - start
+    finally:
+        if stand_in:
+            await stand_in.cleanup()
+
+    report(results, wall_seconds, max_lag_ms)
+    return 0
+
+
+def main() -> int:
+    """Parse arguments and run the replay."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("traces", help="Trace file or directory with traces.ndjson* files")
+    parser.add_argument("--target", default="http://localhost:8765", help="EchoMind addon base URL")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor (1 = real time)")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Cap on in-flight turns (0 = as recorded)")
+    parser.add_argument(
+        "--include-writes",
+        action="store_true",
+        help="Also replay memory writes (synthetic text, one unbatched POST per turn)",
+    )
+    parser.add_argument("--stand-in", action="store_true", help="Replay against a local stand-in instead of --target")
+    parser.add_argument("--stand-in-port", type=int, default=18765, help="Port for the local stand-in")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    return asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())